@@ -4,7 +4,7 @@ INTEGRA - Microservicio Python Avanzado para Resolución de Integrales Triples
 Utiliza SymPy para cálculos simbólicos exactos y SciPy para cálculos numéricos de alta precisión
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import sympy as sp
 from sympy import symbols, integrate, diff, simplify, latex, sympify, N
@@ -12,21 +12,1220 @@ from sympy import sin, cos, tan, exp, log, sqrt, pi, E, oo, Abs
 from sympy.abc import x, y, z, r, theta, phi, rho
 import numpy as np
 from scipy import integrate as scipy_integrate
+from scipy.stats import qmc
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 import plotly.io as pio
+import mpmath
+from mpmath.calculus.quadrature import GaussLegendre, TanhSinh
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+import ast
+import copy
+import ctypes
+import hashlib
+import itertools
+import math
+import os
+import platform
+import queue
+import shutil
+import stat
+import subprocess
+import tempfile
+import threading
+import weakref
 import time
 import traceback
 import re
 import json
 from typing import Dict, List, Tuple, Any, Optional
+from collections import OrderedDict
+from sympy.calculus.util import continuous_domain
+from sympy.printing.c import C99CodePrinter
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import numexpr  # opcional: evaluación fusionada sin temporales por operación
+except ImportError:
+    numexpr = None
+
 app = Flask(__name__)
 CORS(app)
 
+# ============================================================
+# Cuadratura de precisión arbitraria (mpmath)
+# ============================================================
+
+HP_QUADRATURE_RULES = {
+    'gauss-legendre': GaussLegendre,
+    'tanh-sinh': TanhSinh
+}
+HP_MAX_DEGREE = {'gauss-legendre': 6, 'tanh-sinh': 4}  # GL grado 6 = 96 nodos por eje
+HP_PARALLEL_MIN_EVALUATIONS = 20000  # por debajo de esto no compensa usar procesos
+STREAM_ESTIMATE_POINTS = (4, 8, 16)  # estimaciones intermedias en /solve/stream
+STREAM_HEARTBEAT_SECONDS = 10
+SINGULARITY_MAX_BREAKPOINTS = 4  # por eje, para acotar el número de subregiones
+SINGULARITY_ROOT_SAMPLES = 9  # por eje, para ver si la raíz de un factor es real y cruza la región
+HP_WORKERS = max(1, int(os.environ.get('INTEGRA_HP_WORKERS', os.cpu_count() or 1)))
+
+# Motor numérico anidado: Gauss-Legendre vectorizado en el eje interior
+NUMERICAL_ENGINES = ('auto', 'nested', 'tplquad')
+NESTED_INNER_NODES = 32     # el error se estima contra la regla de 16 nodos en los mismos paneles
+NESTED_MAX_PANELS = 64      # paneles del eje interior antes de declarar no convergencia
+NESTED_ERROR_SHARES = {'outer': 0.5, 'middle': 0.25, 'inner': 0.25}  # reparto de epsabs
+# Error estimado por encima de esto (relativo a max(|resultado|, 1)): la integral no converge
+NUMERICAL_MAX_RELATIVE_ERROR = 1e-3
+NUMERICAL_DEADLINE_CHECK_EVERY = 4096  # evaluaciones entre comprobaciones del tiempo límite
+
+# Barridos paramétricos (/solve/sweep)
+SWEEP_MAX_VALUES = 500
+SWEEP_POINTS = 24                  # nodos por eje del método numérico en lote
+SWEEP_MAX_CHUNK_POINTS = 2000000   # evaluaciones por llamada a NumPy (acota la memoria)
+
+_hp_node_cache: Dict[Tuple[str, int, int], List[Tuple[str, str]]] = {}
+_hp_node_lock = threading.Lock()
+_hp_pool: Optional[ProcessPoolExecutor] = None
+_hp_pool_lock = threading.Lock()
+_hp_inline_lock = threading.Lock()  # mpmath.mp es global: serializar el cálculo en este proceso
+
+
+def get_hp_standard_nodes(method: str, degree: int, dps: int) -> List[Tuple[str, str]]:
+    """Nodos y pesos en [-1, 1] para la regla y precisión dadas, cacheados entre peticiones.
+
+    Se guardan como cadenas para poder enviarlos a los procesos de trabajo sin
+    perder dígitos. Para tanh-sinh el nivel m incluye los nodos de todos los
+    niveles anteriores con el paso h = 2^-m ya aplicado a los pesos.
+    """
+    key = (method, degree, dps)
+    with _hp_node_lock:
+        nodes = _hp_node_cache.get(key)
+    if nodes is not None:
+        return nodes
+
+    ctx = mpmath.MPContext()
+    ctx.dps = dps
+    rule = HP_QUADRATURE_RULES[method](ctx)
+    if method == 'tanh-sinh':
+        h = ctx.ldexp(1, -degree)
+        raw = []
+        for level in range(1, degree + 1):
+            raw.extend((xk, wk * h) for xk, wk in rule.calc_nodes(level, ctx.prec))
+    else:
+        raw = rule.calc_nodes(degree, ctx.prec)
+
+    nodes = [(ctx.nstr(xk, dps + 10), ctx.nstr(wk, dps + 10)) for xk, wk in raw]
+    with _hp_node_lock:
+        _hp_node_cache[key] = nodes
+    return nodes
+
+
+def get_hp_axis_nodes(intervals: List[Tuple[Any, Any]], method: str, degree: int, dps: int) -> List[Tuple[str, str]]:
+    """Transforma los nodos estándar a cada subintervalo [a, b] de un eje"""
+    standard = get_hp_standard_nodes(method, degree, dps)
+    ctx = mpmath.MPContext()
+    ctx.dps = dps + 10
+    nodes = []
+    for a, b in intervals:
+        a, b = ctx.mpf(a), ctx.mpf(b)
+        half, mid = (b - a) / 2, (a + b) / 2
+        for xk, wk in standard:
+            nodes.append((ctx.nstr(half * ctx.mpf(xk) + mid, dps + 10),
+                          ctx.nstr(half * ctx.mpf(wk), dps + 10)))
+    return nodes
+
+
+@lru_cache(maxsize=64)
+def _hp_lambdify(expr: sp.Expr, var_names: Tuple[str, ...]):
+    """Lambdify mpmath cacheado por proceso (también dentro de los workers)"""
+    return sp.lambdify([sp.Symbol(name) for name in var_names], expr, 'mpmath')
+
+
+def hp_partial_sum(expr: sp.Expr, var_names: Tuple[str, ...], dps: int,
+                   outer_nodes: List[Tuple[str, str]], middle_nodes: List[Tuple[str, str]],
+                   inner_nodes: List[Tuple[str, str]]) -> Tuple[str, int]:
+    """Suma ponderada del producto tensorial para un bloque de nodos exteriores.
+
+    Es una función de módulo para poder ejecutarse en un ProcessPoolExecutor.
+    Devuelve la suma como cadena y el número de evaluaciones no finitas.
+    """
+    func = _hp_lambdify(expr, var_names)
+    non_finite = 0
+    with mpmath.workdps(dps + 10):
+        outer = [(mpmath.mpf(a), mpmath.mpf(w)) for a, w in outer_nodes]
+        middle = [(mpmath.mpf(b), mpmath.mpf(w)) for b, w in middle_nodes]
+        inner = [(mpmath.mpf(c), mpmath.mpf(w)) for c, w in inner_nodes]
+        total = mpmath.mpf(0)
+        for a, wa in outer:
+            outer_sum = mpmath.mpf(0)
+            for b, wb in middle:
+                inner_sum = mpmath.mpf(0)
+                for c, wc in inner:
+                    value = func(a, b, c)
+                    if isinstance(value, mpmath.mpc):
+                        value = value.real
+                    if not mpmath.isfinite(value):
+                        non_finite += 1
+                        continue
+                    inner_sum += wc * value
+                outer_sum += wb * inner_sum
+            total += wa * outer_sum
+        return mpmath.nstr(total, dps + 10), non_finite
+
+
+def get_hp_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Pool de procesos compartido para paralelizar la dimensión exterior (None si hay un solo worker)"""
+    global _hp_pool
+    if HP_WORKERS <= 1:
+        return None
+    with _hp_pool_lock:
+        if _hp_pool is None:
+            _hp_pool = ProcessPoolExecutor(max_workers=HP_WORKERS)
+        return _hp_pool
+
+# ============================================================
+# Parser de expresiones (tokenizador + descenso recursivo)
+# ============================================================
+
+PARSER_MAX_LENGTH = 500          # caracteres
+PARSER_MAX_TOKENS = 300
+PARSER_MAX_DEPTH = 40            # anidamiento de paréntesis / operadores unarios
+PARSER_MAX_EXPONENT = 100        # |n| en x**n con n numérico
+PARSER_MAX_NUMBER_DIGITS = 30    # dígitos por literal numérico
+PARSER_MAX_RESULT_DIGITS = 1000  # dígitos de una potencia numérica como 2**3**4
+
+PARSER_FUNCTIONS = {
+    'sin': sp.sin, 'sen': sp.sin, 'cos': sp.cos, 'tan': sp.tan,
+    'cot': sp.cot, 'sec': sp.sec, 'csc': sp.csc,
+    'asin': sp.asin, 'arcsin': sp.asin, 'acos': sp.acos, 'arccos': sp.acos,
+    'atan': sp.atan, 'arctan': sp.atan,
+    'sinh': sp.sinh, 'cosh': sp.cosh, 'tanh': sp.tanh,
+    'exp': sp.exp, 'log': sp.log, 'ln': sp.log,
+    'sqrt': sp.sqrt, 'abs': sp.Abs, 'Abs': sp.Abs
+}
+PARSER_CONSTANTS = {'pi': pi, 'π': pi, 'e': E, 'E': E}
+PARSER_SYMBOLS = {
+    'x': x, 'y': y, 'z': z, 'r': r,
+    'theta': theta, 'θ': theta, 'phi': phi, 'φ': phi, 'rho': rho, 'ρ': rho
+}
+# Nombres conocidos de mayor a menor longitud: 'sinh' antes que 'sin', 'exp' antes que 'e'
+_PARSER_NAMES = sorted({**PARSER_FUNCTIONS, **PARSER_CONSTANTS, **PARSER_SYMBOLS}, key=len, reverse=True)
+_PARSER_TOKEN_RE = re.compile(
+    r'(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)'
+    r'|(?P<name>[A-Za-zπθφρ_]+)'
+    r'|(?P<op>\*\*|[-+*/^()])'
+)
+
+
+class ExpressionError(ValueError):
+    """Expresión rechazada por el parser (sintaxis o límites de tamaño)"""
+    
+    def __init__(self, message: str, position: Optional[int] = None):
+        super().__init__(message)
+        self.position = position
+
+
+def tokenize_expression(text: str, extra_names: Tuple[str, ...] = ()) -> List[Tuple[str, str, int]]:
+    """Divide el texto en tokens (tipo, valor, posición) en una sola pasada.
+    
+    Los nombres pegados se separan por el nombre conocido más largo:
+    'xy' -> x, y; 'sinx' -> sin, x; 'ex' -> e, x. Una letra suelta desconocida es un
+    símbolo ('a'), pero un nombre de varias letras debe estar formado solo por nombres
+    conocidos ('foo' es un error, no f*o**2). Dos números seguidos ('3.14.15', '2 3')
+    también son un error en lugar de multiplicarse.
+    """
+    names = sorted({*_PARSER_NAMES, *extra_names}, key=len, reverse=True) if extra_names else _PARSER_NAMES
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        if text[pos].isspace():
+            pos += 1
+            continue
+        match = _PARSER_TOKEN_RE.match(text, pos)
+        if not match:
+            raise ExpressionError(f"Carácter no válido '{text[pos]}'", pos)
+        
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'number':
+            mantissa, _, power = value.lower().partition('e')
+            if len(mantissa.replace('.', '')) > PARSER_MAX_NUMBER_DIGITS or abs(int(power or 0)) > 300:
+                raise ExpressionError("Número fuera de rango", pos)
+            if tokens and tokens[-1][0] == 'number':
+                raise ExpressionError(f"Número inesperado '{value}' (falta un operador)", pos)
+            tokens.append(('number', value, pos))
+        elif kind == 'name':
+            offset = 0
+            while offset < len(value):
+                name = next((known for known in names if value.startswith(known, offset)), None)
+                if name is None:
+                    name = value[offset]
+                    if not ('a' <= name.lower() <= 'z') or len(value) > 1:
+                        raise ExpressionError(f"Identificador desconocido '{value}'", pos + offset)
+                tokens.append(('name', name, pos + offset))
+                offset += len(name)
+        else:
+            tokens.append(('op', '**' if value == '^' else value, pos))
+        
+        if len(tokens) > PARSER_MAX_TOKENS:
+            raise ExpressionError(f"Expresión demasiado larga (máximo {PARSER_MAX_TOKENS} tokens)", pos)
+        pos = match.end()
+    return tokens
+
+
+class ExpressionParser:
+    """Descenso recursivo que construye el árbol SymPy directamente (sin eval).
+    
+    Gramática:
+        suma     := término (('+' | '-') término)*
+        término  := unario (('*' | '/') unario | potencia)*   # potencia sin operador = multiplicación implícita
+        unario   := ('+' | '-') unario | potencia
+        potencia := primario ('**' unario)?                  # asociativa a la derecha
+        primario := número | constante | variable | función '(' suma ')' | función potencia | '(' suma ')'
+    """
+    
+    def __init__(self, text: str, extra_symbols: Tuple[str, ...] = ()):
+        self.text = text
+        self.tokens = tokenize_expression(text, tuple(extra_symbols))
+        self.index = 0
+        self.depth = 0
+        self.symbols = {**PARSER_SYMBOLS, **{name: sp.Symbol(name) for name in extra_symbols}}
+    
+    def peek(self) -> Optional[Tuple[str, str, int]]:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+    
+    def advance(self) -> Tuple[str, str, int]:
+        token = self.peek()
+        if token is None:
+            raise ExpressionError("Expresión incompleta", len(self.text))
+        self.index += 1
+        return token
+    
+    def at_op(self, *ops: str) -> bool:
+        token = self.peek()
+        return token is not None and token[0] == 'op' and token[1] in ops
+    
+    def expect(self, op: str) -> None:
+        token = self.peek()
+        if not self.at_op(op):
+            raise ExpressionError(f"Se esperaba '{op}'", token[2] if token else len(self.text))
+        self.index += 1
+    
+    def parse(self) -> sp.Expr:
+        if not self.tokens:
+            raise ExpressionError("Función vacía", 0)
+        expr = self.parse_sum()
+        token = self.peek()
+        if token is not None:
+            raise ExpressionError(f"Símbolo inesperado '{token[1]}'", token[2])
+        return expr
+    
+    def parse_sum(self) -> sp.Expr:
+        expr = self.parse_term()
+        while self.at_op('+', '-'):
+            op = self.advance()[1]
+            right = self.parse_term()
+            expr = expr + right if op == '+' else expr - right
+        return expr
+    
+    def parse_term(self) -> sp.Expr:
+        expr = self.parse_unary()
+        while True:
+            token = self.peek()
+            if self.at_op('*'):
+                self.advance()
+                expr = expr * self.parse_unary()
+            elif self.at_op('/'):
+                position = self.advance()[2]
+                divisor = self.parse_unary()
+                if divisor == 0:
+                    raise ExpressionError("División por cero", position)
+                expr = expr / divisor
+            elif token is not None and (token[0] in ('number', 'name') or token[1] == '('):
+                expr = expr * self.parse_power()
+            else:
+                return expr
+    
+    def parse_unary(self) -> sp.Expr:
+        self.depth += 1
+        if self.depth > PARSER_MAX_DEPTH:
+            raise ExpressionError(f"Anidamiento excesivo (máximo {PARSER_MAX_DEPTH})", self.peek()[2])
+        try:
+            if self.at_op('-'):
+                self.advance()
+                return -self.parse_unary()
+            if self.at_op('+'):
+                self.advance()
+                return self.parse_unary()
+            return self.parse_power()
+        finally:
+            self.depth -= 1
+    
+    def parse_power(self) -> sp.Expr:
+        base = self.parse_primary()
+        if not self.at_op('**'):
+            return base
+        position = self.advance()[2]
+        exponent = self.parse_unary()
+        
+        if exponent.is_Number and base.is_Number:
+            digits = abs(float(exponent)) * math.log10(abs(float(base)) + 1)
+            if digits > PARSER_MAX_RESULT_DIGITS:
+                raise ExpressionError("Potencia numérica demasiado grande", position)
+        elif exponent.is_Number and abs(exponent) > PARSER_MAX_EXPONENT:
+            raise ExpressionError(f"Exponente demasiado grande (máximo {PARSER_MAX_EXPONENT})", position)
+        
+        result = sp.Pow(base, exponent)
+        # (x**50)**50 se combina en x**2500
+        if result.is_Pow and result.exp.is_Number and not result.base.is_Number \
+                and abs(result.exp) > PARSER_MAX_EXPONENT:
+            raise ExpressionError(f"Exponente demasiado grande (máximo {PARSER_MAX_EXPONENT})", position)
+        return result
+    
+    def parse_primary(self) -> sp.Expr:
+        kind, value, position = self.advance()
+        
+        if kind == 'number':
+            return sp.Integer(value) if value.isdigit() else sp.Float(value)
+        
+        if kind == 'op':
+            if value != '(':
+                raise ExpressionError(f"Símbolo inesperado '{value}'", position)
+            expr = self.parse_sum()
+            self.expect(')')
+            return expr
+        
+        if value in PARSER_FUNCTIONS:
+            if self.at_op('('):
+                self.advance()
+                argument = self.parse_sum()
+                self.expect(')')
+            elif self.peek() is not None:
+                argument = self.parse_power()  # sin x, ln x^2
+            else:
+                raise ExpressionError(f"Falta el argumento de {value}", position)
+            return PARSER_FUNCTIONS[value](argument)
+        
+        if value in PARSER_CONSTANTS:
+            return PARSER_CONSTANTS[value]
+        if value in self.symbols:
+            return self.symbols[value]
+        return sp.Symbol(value)
+
+
+@lru_cache(maxsize=1024)
+def parse_expression(text: str, extra_symbols: Tuple[str, ...] = ()) -> sp.Expr:
+    """Parsea (con caché) una expresión validando tamaño, profundidad y exponentes antes de construirla"""
+    if len(text) > PARSER_MAX_LENGTH:
+        raise ExpressionError(f"Expresión demasiado larga (máximo {PARSER_MAX_LENGTH} caracteres)", PARSER_MAX_LENGTH)
+    return ExpressionParser(text, extra_symbols).parse()
+
+# ============================================================
+# Rejillas evaluadas compartidas entre procesos (.npy mapeados en memoria)
+# ============================================================
+
+# /dev/shm es memoria compartida en Linux; en otros sistemas se usa el directorio temporal
+CACHE_DIR = os.environ.get('INTEGRA_CACHE_DIR') or os.path.join(
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'integra-cache')
+
+
+def ensure_private_dir(path: str) -> bool:
+    """Crea path con modo 0700 y comprueba que es un directorio propio sin acceso de grupo/otros.
+    
+    CACHE_DIR está en una ruta predecible de un directorio compartido: si otro usuario lo
+    creó antes, es un enlace simbólico o otros pueden escribir en él, su contenido no es de
+    fiar y las cachés en disco (rejillas, bibliotecas compiladas, primitivas) se desactivan.
+    Un directorio propio que otros solo podían leer (creado con la umask por defecto) se
+    restringe a 0700.
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+        if not stat.S_ISDIR(info.st_mode) or info.st_mode & 0o022:
+            return False
+        if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+            return False
+        if info.st_mode & 0o077:
+            os.chmod(path, 0o700)
+            return not os.lstat(path).st_mode & 0o077
+    except OSError:
+        return False
+    return True
+
+if not ensure_private_dir(CACHE_DIR):
+    print(f"Aviso: {CACHE_DIR} no es un directorio privado de este usuario; cachés en disco desactivadas")
+GRID_STORE_MAX_BYTES = int(os.environ.get('INTEGRA_GRID_CACHE_MB', 256)) * 1024 * 1024
+GRID_STORE_MIN_REQUESTS = 2      # una rejilla se publica a partir de su segunda petición
+GRID_STORE_MIN_BYTES = 64 * 1024  # las rejillas pequeñas son más baratas de recalcular
+
+
+class SharedGridStore:
+    """Rejillas evaluadas compartidas sin copia entre los procesos worker.
+    
+    Cada rejilla es un fichero .npy que cualquier proceso abre con np.load(mmap_mode='r'):
+    las páginas las comparte el sistema operativo, así que N workers no ocupan N copias.
+    Se escribe de forma atómica (fichero temporal + os.replace).
+    
+    Las referencias se cuentan con weakref.finalize sobre el array devuelto (las vistas
+    mantienen vivo el mapeo). La expulsión es LRU por mtime hasta GRID_STORE_MAX_BYTES y
+    nunca borra entradas referenciadas en este proceso; en POSIX borrar un fichero que
+    otro proceso tiene mapeado es seguro, y en Windows el borrado falla y se omite.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = os.path.join(directory, 'grids')
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._refs: Dict[str, int] = {}
+        self._requests: Dict[str, int] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        self.enabled = ensure_private_dir(directory) and ensure_private_dir(self.directory)
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npy")
+    
+    def _track(self, key: str, array: np.ndarray) -> np.ndarray:
+        with self._lock:
+            self._refs[key] = self._refs.get(key, 0) + 1
+        weakref.finalize(array, self._release, key)
+        return array
+    
+    def _release(self, key: str) -> None:
+        with self._lock:
+            remaining = self._refs.get(key, 0) - 1
+            if remaining > 0:
+                self._refs[key] = remaining
+            else:
+                self._refs.pop(key, None)
+    
+    def get_or_compute(self, key: str, compute) -> Optional[np.ndarray]:
+        """Devuelve la rejilla compartida o la calcula; las populares se publican para otros procesos"""
+        if not self.enabled:
+            return compute()
+        
+        path = self._path(key)
+        try:
+            array = np.load(path, mmap_mode='r')
+            os.utime(path)  # LRU
+            with self._lock:
+                self._stats['hits'] += 1
+            return self._track(key, array)
+        except (OSError, ValueError):
+            pass
+        
+        with self._lock:
+            self._stats['misses'] += 1
+            self._requests[key] = self._requests.get(key, 0) + 1
+            popular = self._requests[key] >= GRID_STORE_MIN_REQUESTS
+        
+        array = compute()
+        if popular and array is not None and array.nbytes >= GRID_STORE_MIN_BYTES:
+            self._store(key, array)
+        return array
+    
+    def _store(self, key: str, array: np.ndarray) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as handle:
+                np.save(handle, np.ascontiguousarray(array))
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._stats['stored'] += 1
+                self._requests.pop(key, None)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._evict()
+    
+    def _evict(self) -> None:
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.npy')]
+        except OSError:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            key = entry.name[:-len('.npy')]
+            with self._lock:
+                if self._refs.get(key):
+                    continue
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+                with self._lock:
+                    self._stats['evicted'] += 1
+            except OSError:
+                continue  # en uso por otro proceso (Windows) o ya expulsada
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'enabled': self.enabled, 'directory': self.directory,
+                    'referenced': len(self._refs), **self._stats}
+
+grid_store = SharedGridStore(CACHE_DIR, GRID_STORE_MAX_BYTES)
+
+# ============================================================
+# Re-evaluación incremental de rejillas (cambios de límites o resolución)
+# ============================================================
+
+INCREMENTAL_GRID_MAX_BYTES = int(os.environ.get('INTEGRA_INCREMENTAL_GRID_MB', 64)) * 1024 * 1024
+
+
+GRID_MATCH_TOLERANCE = 1e-9  # fracción del paso dentro de la cual dos nodos se consideran el mismo
+
+
+class IncrementalGridCache:
+    """Última rejilla evaluada por (integrando, nivel), con sus ejes (linspace normales).
+    
+    Al pedir otra rejilla del mismo integrando y nivel se copian los valores de los nodos que
+    coinciden con los de la anterior y solo se evalúan los demás. Coinciden al desplazar los
+    límites un número entero de pasos con la misma resolución, o al pasar de n a 2n - 1 puntos
+    (y al revés) con los mismos límites; en otro caso se evalúa la rejilla entera. La rejilla
+    guardada pasa a ser la de la última petición. Es memoria del proceso, con expulsión LRU
+    hasta INCREMENTAL_GRID_MAX_BYTES; grid_store sigue atendiendo las repeticiones exactas.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._blocks: 'OrderedDict[Tuple, Tuple]' = OrderedDict()
+        self._bytes = 0
+        self._stats = {'requests': 0, 'partial_hits': 0, 'reused_points': 0, 'evaluated_points': 0}
+    
+    @staticmethod
+    def _match(values: np.ndarray, old_values: np.ndarray):
+        """Nodos de values que también están en old_values: (máscara, posición en old_values)"""
+        if len(old_values) < 2 or old_values[-1] == old_values[0]:
+            return np.zeros(len(values), dtype=bool), np.zeros(0, dtype=int)
+        old_step = (old_values[-1] - old_values[0]) / (len(old_values) - 1)
+        index = np.rint((values - old_values[0]) / old_step).astype(int)
+        present = (index >= 0) & (index < len(old_values))
+        index = np.clip(index, 0, len(old_values) - 1)
+        present &= np.abs(values - old_values[index]) <= GRID_MATCH_TOLERANCE * abs(old_step)
+        return present, index[present]
+    
+    def evaluate(self, key: Tuple, func, level: float, a_vals: np.ndarray, b_vals: np.ndarray) -> np.ndarray:
+        """Rejilla (len(b), len(a)) de func(a, b, level) reutilizando la rejilla anterior de key"""
+        F = np.full((len(b_vals), len(a_vals)), np.nan)
+        known = np.zeros(F.shape, dtype=bool)
+        
+        with self._lock:
+            self._stats['requests'] += 1
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+        if block is not None:
+            old_a, old_b, old_F = block
+            in_a, from_a = self._match(a_vals, old_a)
+            in_b, from_b = self._match(b_vals, old_b)
+            if in_a.any() and in_b.any():
+                rows, cols = np.flatnonzero(in_b), np.flatnonzero(in_a)
+                F[np.ix_(rows, cols)] = old_F[np.ix_(from_b, from_a)]
+                known[np.ix_(rows, cols)] = True
+        
+        missing = ~known
+        A, B = np.meshgrid(a_vals, b_vals)
+        with np.errstate(all='ignore'):
+            values = np.real(np.asarray(func(A[missing], B[missing], level)))
+        F[missing] = np.broadcast_to(values, (int(missing.sum()),))
+        
+        stored = (np.array(a_vals, dtype=float), np.array(b_vals, dtype=float), F.copy())
+        with self._lock:
+            reused = int(known.sum())
+            self._stats['partial_hits'] += reused > 0
+            self._stats['reused_points'] += reused
+            self._stats['evaluated_points'] += F.size - reused
+            previous = self._blocks.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[-1].nbytes
+            self._blocks[key] = stored
+            self._bytes += stored[-1].nbytes
+            while self._bytes > self.max_bytes and len(self._blocks) > 1:
+                self._bytes -= self._blocks.popitem(last=False)[1][-1].nbytes
+        return F
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'blocks': len(self._blocks), 'bytes': self._bytes, **self._stats}
+
+incremental_grids = IncrementalGridCache(INCREMENTAL_GRID_MAX_BYTES)
+
+# ============================================================
+# Backend compilado para integrandos frecuentes (C vía ctypes, numexpr o lambdify)
+# ============================================================
+
+COMPILED_BACKEND = os.environ.get('INTEGRA_COMPILED_BACKEND', 'auto')  # 'auto' u 'off'
+COMPILER = os.environ.get('INTEGRA_CC') or shutil.which('cc') or shutil.which('gcc')
+COMPILE_AFTER_REQUESTS = int(os.environ.get('INTEGRA_COMPILE_AFTER', 2))
+COMPILE_TIMEOUT_SECONDS = 30
+COMPILED_ABI_VERSION = 1  # cambiarlo invalida los artefactos guardados
+COMPILED_CHECK_POINTS = 64  # puntos de [-3, 3]³ donde el .so debe coincidir con lambdify
+
+COMPILED_SOURCE_TEMPLATE = """#include <math.h>
+static inline double integrand(double v0, double v1, double v2) {{
+    return {body};
+}}
+double integra_point(double v0, double v1, double v2) {{
+    return integrand(v0, v1, v2);
+}}
+void integra_array(long n, const double *a, const double *b, const double *c, double *out) {{
+    #pragma omp simd
+    for (long i = 0; i < n; i++) out[i] = integrand(a[i], b[i], c[i]);
+}}
+"""
+
+
+class CompiledIntegrand:
+    """Integrando compilado a C con la misma firma que la función de lambdify.
+    
+    Los escalares usan integra_point directamente (tplquad evalúa punto a punto) y los
+    arrays se difunden a la forma común y se recorren en un solo bucle C, sin temporales
+    por operación. ctypes libera el GIL durante la llamada.
+    """
+    
+    backend = 'c'
+    
+    def __init__(self, library: ctypes.CDLL):
+        self._library = library  # mantiene cargada la biblioteca
+        self._point = library.integra_point
+        self._point.restype = ctypes.c_double
+        self._point.argtypes = [ctypes.c_double] * 3
+        array = np.ctypeslib.ndpointer(dtype=np.float64, flags='C_CONTIGUOUS')
+        self._array = library.integra_array
+        self._array.restype = None
+        self._array.argtypes = [ctypes.c_long, array, array, array, array]
+    
+    def __call__(self, a, b, c):
+        try:
+            return self._point(a, b, c)
+        except ctypes.ArgumentError:
+            pass
+        arrays = [np.ascontiguousarray(value, dtype=np.float64) for value in np.broadcast_arrays(a, b, c)]
+        out = np.empty(arrays[0].shape)
+        self._array(out.size, *arrays, out)
+        return out
+
+
+class CompiledIntegrandCache:
+    """Compila en segundo plano los integrandos que se piden a menudo.
+    
+    La primera vez se devuelve numexpr (si está instalado) o lambdify; a partir de
+    COMPILE_AFTER_REQUESTS peticiones de la misma expresión canónica se genera C con
+    sp.ccode, se compila con el compilador local y el .so queda en CACHE_DIR (privado, ver
+    ensure_private_dir) junto a su SHA-256 en {key}.sha256. Los demás procesos y los
+    reinicios cargan ese .so en lugar de recompilar, pero solo si es un fichero nuestro que
+    nadie más puede escribir, su SHA-256 coincide con el guardado y da los mismos valores
+    que lambdify en los puntos de prueba; si no, se borra y se vuelve a compilar. Si no hay
+    compilador, la expresión no es traducible a C (funciones especiales, números complejos)
+    o la compilación falla, se sigue usando lambdify.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = os.path.join(directory, 'compiled')
+        self._lock = threading.Lock()
+        self._requests: Dict[str, int] = {}
+        self._loaded: Dict[str, CompiledIntegrand] = {}
+        self._disk_checked: set = set()
+        self._pending: set = set()
+        self._failed: set = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {'compiled': 0, 'loaded': 0, 'rejected': 0, 'failed': 0,
+                       'compiled_hits': 0, 'fallback_hits': 0}
+        self.enabled = (COMPILED_BACKEND != 'off' and COMPILER is not None
+                        and ensure_private_dir(directory) and ensure_private_dir(self.directory))
+    
+    @staticmethod
+    def make_key(variables, expr: sp.Expr) -> str:
+        parts = [sp.srepr(expr), [str(var) for var in variables], COMPILED_ABI_VERSION,
+                 platform.machine(), platform.system(), COMPILER]
+        return hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+    
+    def _library_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.so")
+    
+    def _digest_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.sha256")
+    
+    @staticmethod
+    def _digest(path: str) -> str:
+        with open(path, 'rb') as handle:
+            return hashlib.sha256(handle.read()).hexdigest()
+    
+    def lambdify(self, variables, expr: sp.Expr):
+        """Sustituto de sp.lambdify(variables, expr, 'numpy') con backend compilado opcional"""
+        if self.enabled and len(variables) == 3:
+            key = self.make_key(variables, expr)
+            compiled = self._load(key, variables, expr)
+            if compiled is not None:
+                with self._lock:
+                    self._stats['compiled_hits'] += 1
+                return compiled
+            
+            with self._lock:
+                self._requests[key] = self._requests.get(key, 0) + 1
+                schedule = (self._requests[key] >= COMPILE_AFTER_REQUESTS
+                            and key not in self._pending and key not in self._failed)
+                if schedule:
+                    self._pending.add(key)
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='integra-cc')
+                self._stats['fallback_hits'] += 1
+            if schedule:
+                self._executor.submit(self._compile, key, variables, expr)
+        
+        return self._fallback(variables, expr)
+    
+    @staticmethod
+    def _fallback(variables, expr: sp.Expr):
+        if numexpr is not None:
+            try:
+                func = sp.lambdify(variables, expr, 'numexpr')
+                func(*[np.full(2, 0.5)] * len(variables))  # numexpr falla al evaluar, no al generar
+                return func
+            except Exception:
+                pass
+        return sp.lambdify(variables, expr, 'numpy')
+    
+    def _load(self, key: str, variables, expr: sp.Expr) -> Optional[CompiledIntegrand]:
+        """Biblioteca ya cargada o, la primera vez que se pide key en este proceso, la del disco"""
+        with self._lock:
+            compiled = self._loaded.get(key)
+            if compiled is not None or key in self._disk_checked:
+                return compiled
+            self._disk_checked.add(key)
+        
+        compiled = self._load_from_disk(key, variables, expr)
+        if compiled is not None:
+            with self._lock:
+                self._loaded[key] = compiled
+                self._stats['loaded'] += 1
+        return compiled
+    
+    def _load_from_disk(self, key: str, variables, expr: sp.Expr) -> Optional[CompiledIntegrand]:
+        path, digest_path = self._library_path(key), self._digest_path(key)
+        try:
+            with open(digest_path) as handle:
+                expected = handle.read().strip()
+        except OSError:
+            return None  # nunca se compiló (o la compilación no terminó)
+        try:
+            info = os.lstat(path)
+            if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+                raise ValueError("el fichero no es nuestro o lo pueden escribir otros usuarios")
+            if self._digest(path) != expected:
+                raise ValueError("el SHA-256 no coincide con el guardado")
+            compiled = CompiledIntegrand(ctypes.CDLL(path))
+            self._check_against_lambdify(compiled, variables, expr)
+            return compiled
+        except Exception as e:
+            print(f"Aviso: se descarta la biblioteca compilada {path}: {e}")
+            with self._lock:
+                self._stats['rejected'] += 1
+            for stale in (digest_path, path):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+            return None
+    
+    def _write_digest(self, key: str, digest: str) -> None:
+        """{key}.sha256 atómico: un .so sin su SHA-256 nunca se carga del disco"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as handle:
+                handle.write(digest)
+            os.replace(tmp_path, self._digest_path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    
+    def _compile(self, key: str, variables, expr: sp.Expr) -> None:
+        path = self._library_path(key)
+        try:
+            try:
+                os.remove(self._digest_path(key))  # el .so se va a sustituir
+            except FileNotFoundError:
+                pass
+            if expr.has(sp.I):
+                raise ValueError("integrando complejo")
+            renamed = expr.subs({var: sp.Symbol(f"v{i}", real=True) for i, var in enumerate(variables)},
+                                simultaneous=True)
+            # human=False devuelve las funciones sin traducción a C en lugar de comentarlas
+            _, unsupported, body = C99CodePrinter({'human': False}).doprint(renamed)
+            if unsupported:
+                raise ValueError(f"sin traducción a C: {', '.join(sorted(map(str, unsupported)))}")
+            source = COMPILED_SOURCE_TEMPLATE.format(body=body)
+            with tempfile.TemporaryDirectory(dir=self.directory) as build_dir:
+                source_path = os.path.join(build_dir, 'integrand.c')
+                with open(source_path, 'w') as handle:
+                    handle.write(source)
+                # Sin -ffast-math: inf/nan deben propagarse igual que en NumPy
+                subprocess.run([COMPILER, '-O3', '-fno-math-errno', '-fopenmp-simd', '-shared', '-fPIC',
+                                '-o', os.path.join(build_dir, 'integrand.so'), source_path, '-lm'],
+                               check=True, capture_output=True, timeout=COMPILE_TIMEOUT_SECONDS)
+                library_path = os.path.join(build_dir, 'integrand.so')
+                digest = self._digest(library_path)
+                os.replace(library_path, path)
+            if self._digest(path) != digest:
+                raise ValueError("la biblioteca cambió entre la compilación y la carga")
+            compiled = CompiledIntegrand(ctypes.CDLL(path))
+            self._check_against_lambdify(compiled, variables, expr)
+            self._write_digest(key, digest)
+            with self._lock:
+                self._loaded[key] = compiled
+                self._stats['compiled'] += 1
+        except Exception as e:
+            detail = e.stderr.decode(errors='replace').strip() if isinstance(e, subprocess.CalledProcessError) else e
+            print(f"Aviso: no se pudo compilar el integrando {expr}: {detail}")
+            with self._lock:
+                self._failed.add(key)
+                self._stats['failed'] += 1
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+    
+    @staticmethod
+    def _check_against_lambdify(compiled: CompiledIntegrand, variables, expr: sp.Expr) -> None:
+        """El resultado no puede depender de qué backend lo evalúe.
+        
+        Algunas traducciones de ccode no son equivalentes a NumPy: x**(1/3) pasa a cbrt(x),
+        que es real para x < 0 donde NumPy da nan. Se compara en puntos de prueba con
+        signos de ambos tipos (nan e inf deben coincidir) antes de usar el .so.
+        """
+        points = np.random.default_rng(0).uniform(-3, 3, size=(3, COMPILED_CHECK_POINTS))
+        points[:, :4] = [[0, 1, -1, 0.5]] * 3
+        reference = sp.lambdify(variables, expr, 'numpy')
+        with np.errstate(all='ignore'):
+            expected = np.broadcast_to(np.asarray(reference(*points), dtype=complex), points.shape[1:])
+            actual = compiled(*points)
+        expected = np.where(np.abs(expected.imag) > 0, np.nan, expected.real)
+        if not np.allclose(actual, expected, rtol=1e-9, atol=1e-12, equal_nan=True):
+            raise ValueError("el código C no coincide con lambdify en los puntos de prueba")
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'enabled': self.enabled, 'compiler': COMPILER, 'numexpr': numexpr is not None,
+                    'pending': len(self._pending), **self._stats}
+
+compiled_integrands = CompiledIntegrandCache(CACHE_DIR)
+
+# ============================================================
+# Memo de primitivas para los pasos de solve_symbolic
+# ============================================================
+
+ANTIDERIVATIVE_MEMO_MAX_ENTRIES = int(os.environ.get('INTEGRA_ANTIDERIVATIVE_MEMO', 5000))
+ANTIDERIVATIVE_VARIABLE = sp.Symbol('_integra_u')  # variable canónica de las claves
+SREPR_CONSTANTS = {'pi': sp.pi, 'E': sp.E, 'I': sp.I, 'oo': sp.oo, 'zoo': sp.zoo, 'nan': sp.nan,
+                   'EulerGamma': sp.EulerGamma, 'Catalan': sp.Catalan, 'GoldenRatio': sp.GoldenRatio}
+SREPR_ATOMS = {'Symbol': sp.Symbol, 'Integer': sp.Integer, 'Rational': sp.Rational, 'Float': sp.Float}
+
+
+def parse_srepr(text: str) -> sp.Expr:
+    """Reconstruye una expresión guardada con sp.srepr sin eval ni sympify.
+    
+    Solo se aceptan llamadas a clases de SymPy por nombre, las constantes de SREPR_CONSTANTS
+    y literales (cadenas y keywords solo en Symbol/Integer/Rational/Float, que no evalúan
+    su texto). Cualquier otra construcción lanza ValueError.
+    """
+    def build(node):
+        if isinstance(node, ast.Name) and node.id in SREPR_CONSTANTS:
+            return SREPR_CONSTANTS[node.id]
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            operand = node.operand
+            if isinstance(operand, ast.Constant) and type(operand.value) in (int, float):
+                return -operand.value
+            return -build(operand)
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return node.value
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)):
+            raise ValueError(f"construcción no permitida: {ast.dump(node)[:80]}")
+        
+        name = node.func.id
+        if name in SREPR_ATOMS:
+            literals = [build_literal(arg) for arg in node.args]
+            keywords = {keyword.arg: build_literal(keyword.value) for keyword in node.keywords}
+            return SREPR_ATOMS[name](*literals, **keywords)
+        constructor = getattr(sp, name, None)
+        if not (isinstance(constructor, type) and issubclass(constructor, sp.Basic)) or node.keywords:
+            raise ValueError(f"constructor no permitido: {name}")
+        return constructor(*[build(arg) for arg in node.args])
+    
+    def build_literal(node):
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            value = build_literal(node.operand)
+            if type(value) in (int, float):
+                return -value
+        elif isinstance(node, ast.Constant) and type(node.value) in (int, float, str, bool):
+            return node.value
+        raise ValueError("argumento no literal")
+    
+    expr = build(ast.parse(text, mode='eval').body)
+    if not isinstance(expr, sp.Expr):
+        raise ValueError("no es una expresión")
+    return expr
+
+
+class AntiderivativeMemo:
+    """Memo de primitivas de una variable compartido entre peticiones y reinicios.
+    
+    ∫ c·g(v) dv se separa en el factor constante c y la parte g que depende de v; la clave
+    es g con v renombrada a una variable canónica, así que ∫ rho**2*sin(phi) dphi y
+    ∫ sin(phi) dphi comparten la primitiva -cos(u). Los límites se evalúan por sustitución
+    (regla de Barrow), que solo es válida si g y su primitiva son continuas en el intervalo:
+    si no (singularidades, primitivas a trozos, extremos donde la sustitución no está
+    definida) se usa integrate() con los límites, como antes.
+    
+    Las primitivas se guardan como srepr en un JSON de CACHE_DIR; al guardar se mezclan
+    con las que hayan escrito otros procesos. Si CACHE_DIR no es privado el memo solo
+    vive en memoria.
+    """
+    
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.persistent = ensure_private_dir(os.path.dirname(path))
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._parsed: Dict[str, sp.Expr] = {}
+        self._dirty = False
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0}
+        self._entries.update(self._read())
+    
+    def _read(self) -> Dict[str, str]:
+        if not self.persistent:
+            return {}
+        try:
+            with open(self.path) as handle:
+                data = json.load(handle)
+            if not isinstance(data, dict):
+                return {}
+            return {key: value for key, value in data.items() if isinstance(value, str)}
+        except (OSError, ValueError):
+            return {}
+    
+    def integrate(self, expr: sp.Expr, var: sp.Symbol, lower, upper) -> sp.Expr:
+        """Equivalente a integrate(expr, (var, lower, upper)) usando el memo cuando es seguro"""
+        lower, upper = sp.sympify(lower, strict=True), sp.sympify(upper, strict=True)
+        if lower.is_number and upper.is_number:
+            # Linealidad: cada término se resuelve por separado; si alguno no admite
+            # la regla de Barrow se integra la expresión completa
+            values = [self._integrate_term(term, var, lower, upper) for term in sp.Add.make_args(expr)]
+            if all(value is not None for value in values):
+                return sp.Add(*values)
+        with self._lock:
+            self._stats['bypassed'] += 1
+        return integrate(expr, (var, lower, upper))
+    
+    def _integrate_term(self, term: sp.Expr, var: sp.Symbol, lower, upper) -> Optional[sp.Expr]:
+        coefficient, dependent = term.as_independent(var, as_Add=False)
+        u = ANTIDERIVATIVE_VARIABLE
+        canonical = dependent.subs(var, u)
+        if canonical.free_symbols != {u}:
+            # Constante respecto a var o dependiente de otras variables: no es comprobable
+            return coefficient * dependent * (upper - lower) if not canonical.free_symbols else None
+        
+        key = sp.srepr(canonical)
+        antiderivative = self._lookup(key)
+        hit = antiderivative is not None
+        if not hit:
+            antiderivative = integrate(canonical, u)
+        
+        value = self._evaluate(canonical, antiderivative, lower, upper)
+        if value is None:
+            return None
+        with self._lock:
+            self._stats['hits' if hit else 'misses'] += 1
+        if not hit:
+            self._remember(key, antiderivative)
+        return coefficient * value
+    
+    @staticmethod
+    def _evaluate(canonical: sp.Expr, antiderivative: sp.Expr, lower, upper) -> Optional[sp.Expr]:
+        """F(upper) - F(lower), o None si la regla de Barrow no es aplicable"""
+        if antiderivative.has(sp.Integral, sp.Piecewise):
+            return None
+        u = ANTIDERIVATIVE_VARIABLE
+        try:
+            interval = sp.Interval(*sorted([lower, upper], key=lambda bound: float(N(bound))))
+            for function in (canonical, antiderivative):
+                if continuous_domain(function, u, interval) != interval:
+                    return None
+        except Exception:
+            return None
+        value = antiderivative.subs(u, upper) - antiderivative.subs(u, lower)
+        if value.has(sp.nan, sp.zoo, sp.oo, -sp.oo):
+            return None
+        return value
+    
+    def _lookup(self, key: str) -> Optional[sp.Expr]:
+        with self._lock:
+            parsed = self._parsed.get(key)
+            stored = self._entries.get(key)
+            if stored is not None:
+                self._entries.move_to_end(key)
+        if parsed is None and stored is not None:
+            try:
+                parsed = parse_srepr(stored)
+            except Exception:
+                return None
+            with self._lock:
+                self._parsed[key] = parsed
+        return parsed
+    
+    def _remember(self, key: str, antiderivative: sp.Expr) -> None:
+        with self._lock:
+            self._entries[key] = sp.srepr(antiderivative)
+            self._parsed[key] = antiderivative
+            self._dirty = True
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._parsed.pop(evicted, None)
+    
+    def save(self) -> None:
+        """Persiste las primitivas nuevas (escritura atómica, mezclando con otros procesos)"""
+        with self._lock:
+            if not self._dirty or not self.persistent:
+                return
+            self._dirty = False
+            entries = dict(self._entries)
+        merged = self._read()
+        merged.update(entries)
+        if len(merged) > self.max_entries:
+            merged = dict(list(merged.items())[-self.max_entries:])
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as handle:
+                json.dump(merged, handle)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), 'persistent': self.persistent, **self._stats}
+
+antiderivative_memo = AntiderivativeMemo(os.path.join(CACHE_DIR, 'antiderivatives.json'),
+                                         ANTIDERIVATIVE_MEMO_MAX_ENTRIES)
+
+# ============================================================
+# Primitivas por eje e integrando (cambios de límites sin reintegrar)
+# ============================================================
+
+TRIPLE_ANTIDERIVATIVE_MAX_ENTRIES = 512
+ENTIRE_FUNCTIONS = (sp.sin, sp.cos, sp.exp, sp.sinh, sp.cosh)
+
+
+def is_entire(expr: sp.Expr) -> bool:
+    """Polinomios, sin, cos, exp, sinh, cosh y sus composiciones: continuas en todo R³.
+    
+    Para ellas la primitiva también es continua en cualquier caja y la integral se puede
+    obtener por la regla de Barrow en cada eje sin comprobar singularidades.
+    """
+    for node in sp.preorder_traversal(expr):
+        if isinstance(node, sp.Function) and not isinstance(node, ENTIRE_FUNCTIONS):
+            return False
+        if node.is_Pow and not ((node.exp.is_Integer and node.exp >= 0)
+                                or (node.base.is_number and node.base.is_positive)):
+            return False
+    return True
+
+
+class TripleAntiderivativeCache:
+    """Primitivas iteradas por eje [G₁, G₂, G₃] por integrando canónico y orden de integración.
+    
+    G₁ = ∫f dv₁, G₂ = ∫G₁ dv₂, G₃ = ∫G₂ dv₃ (indefinidas). El paso k de la integral sobre
+    una caja es la suma alterna de G_k en los vértices de los k primeros ejes, así que una
+    petición que solo cambia los límites rehace los tres pasos por sustitución. Solo se
+    guardan para integrandos enteros (is_entire) cuyas primitivas también lo son; para el
+    resto se guarda None y solve_symbolic integra paso a paso como siempre.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Optional[List[sp.Expr]]]' = OrderedDict()
+        self._stats = {'hits': 0, 'computed': 0, 'not_applicable': 0}
+    
+    def get_or_compute(self, integrand: sp.Expr, order: List[sp.Symbol]) -> Tuple[Optional[List[sp.Expr]], bool]:
+        """([G₁, G₂, G₃] o None, si venían de la caché)"""
+        key = sp.srepr(integrand) + '|' + ','.join(str(var) for var in order)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                antiderivatives = self._entries[key]
+                self._stats['hits' if antiderivatives is not None else 'not_applicable'] += 1
+                return antiderivatives, True
+        
+        antiderivatives = None
+        if is_entire(integrand):
+            antiderivatives = []
+            current = integrand
+            for var in order:
+                current = integrate(current, var)
+                if current.has(sp.Integral) or not is_entire(current):
+                    antiderivatives = None
+                    break
+                antiderivatives.append(current)
+        
+        with self._lock:
+            self._stats['computed' if antiderivatives is not None else 'not_applicable'] += 1
+            self._entries[key] = antiderivatives
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return antiderivatives, False
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), **self._stats}
+
+
+def evaluate_on_box(antiderivative: sp.Expr, bounds: List[Tuple[sp.Symbol, sp.Expr, sp.Expr]]) -> sp.Expr:
+    """Regla de Barrow en varios ejes: Σ (-1)^(nº de límites inferiores) · G(vértice)"""
+    total = sp.Integer(0)
+    for corner in itertools.product((0, 1), repeat=len(bounds)):
+        point = {var: upper if use_upper else lower for (var, lower, upper), use_upper in zip(bounds, corner)}
+        total += (-1) ** (len(bounds) - sum(corner)) * antiderivative.subs(point)
+    return total
+
+triple_antiderivatives = TripleAntiderivativeCache(TRIPLE_ANTIDERIVATIVE_MAX_ENTRIES)
+
+# ============================================================
+# Construcción concurrente de trazas Plotly
+# ============================================================
+
+SURFACE_LEVELS = 5  # niveles de la superficie; los cortes usan los pares (0, 2, 4)
+SLICE_LEVELS = 3
+PLOT_WORKERS = max(1, int(os.environ.get('INTEGRA_PLOT_WORKERS', min(4, os.cpu_count() or 1))))
+
+_plot_executor: Optional[ThreadPoolExecutor] = None
+_plot_executor_lock = threading.Lock()
+
+class StepLog(list):
+    """Lista de pasos que además notifica cada paso nuevo (usada por /solve/stream)"""
+    
+    def __init__(self, on_event=None):
+        super().__init__()
+        self.on_event = on_event
+    
+    def append(self, text: str) -> None:
+        super().append(text)
+        if self.on_event:
+            self.on_event('step', {'index': len(self), 'text': text})
+
 class AdvancedIntegralSolver:
     """Solver avanzado para integrales triples con capacidades simbólicas y numéricas"""
     
@@ -34,46 +1233,18 @@ class AdvancedIntegralSolver:
         self.timeout = 45  # 45 segundos máximo por integral
         self.max_iterations = 1000000
         self.precision_digits = 15
+        self.max_precision_digits = 100
+        
+    def parse_function(self, func_str: str, extra_symbols: Tuple[str, ...] = ()) -> sp.Expr:
+        """Parsea función de string a expresión SymPy con soporte extendido.
         
-    def parse_function(self, func_str: str) -> sp.Expr:
-        """Parsea función de string a expresión SymPy con soporte extendido"""
+        Usa el parser propio (sin sympify/eval): acepta ^, sen, ln, π, multiplicación
+        implícita (2x, x(y+1)) y rechaza entradas demasiado grandes antes de construirlas.
+        """
         try:
-            # Normalizar la función
-            func_str = func_str.strip().replace(' ', '')
-            
-            # Reemplazos avanzados para compatibilidad
-            replacements = {
-                '^': '**',
-                'sen': 'sin',
-                'ln': 'log',
-                'π': 'pi',
-                'e^': 'exp',
-                'sqrt': 'sqrt',
-                'abs': 'Abs',
-                'arcsin': 'asin',
-                'arccos': 'acos',
-                'arctan': 'atan',
-                'sinh': 'sinh',
-                'cosh': 'cosh',
-                'tanh': 'tanh'
-            }
-            
-            parsed = func_str
-            for old, new in replacements.items():
-                parsed = parsed.replace(old, new)
-            
-            # Manejar multiplicación implícita
-            parsed = re.sub(r'(\d)([a-zA-Z])', r'\1*\2', parsed)
-            parsed = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', parsed)
-            parsed = re.sub(r'\)([a-zA-Z\(])', r')*\1', parsed)
-            parsed = re.sub(r'([a-zA-Z])\(', r'\1*(', parsed)
-            
-            # Convertir a expresión SymPy
-            expr = sympify(parsed, locals={'x': x, 'y': y, 'z': z, 'r': r, 
-                                         'theta': theta, 'phi': phi, 'rho': rho,
-                                         'pi': pi, 'E': E})
-            return expr
-            
+            return parse_expression(str(func_str).strip(), tuple(extra_symbols))
+        except ExpressionError as e:
+            raise ExpressionError(f"Error parseando función '{func_str}': {str(e)}", e.position)
         except Exception as e:
             raise ValueError(f"Error parseando función '{func_str}': {str(e)}")
     
@@ -101,51 +1272,82 @@ class AdvancedIntegralSolver:
         else:
             raise ValueError(f"Sistema de coordenadas no soportado: {coord_system}")
     
-    def solve_symbolic(self, func_expr: sp.Expr, limits: Dict, coord_system: str) -> Dict[str, Any]:
+    def integration_variables(self, coord_system: str) -> Tuple[sp.Symbol, sp.Symbol, sp.Symbol]:
+        """Variables asociadas a los límites x, y, z según el sistema de coordenadas"""
+        if coord_system == 'cartesian':
+            return (x, y, z)
+        elif coord_system == 'cylindrical':
+            return (r, theta, z)      # r en x, theta en y
+        else:  # spherical
+            return (rho, theta, phi)  # rho en x, theta en y, phi en z
+    
+    def integration_order(self, coord_system: str, limits: Dict) -> List[Tuple[sp.Symbol, Any, Any]]:
+        """(variable, inferior, superior) en orden de integración: z/φ, luego y/θ, luego x/r/ρ"""
+        variables = self.integration_variables(coord_system)
+        return [(var, limits[coord][0], limits[coord][1])
+                for var, coord in reversed(list(zip(variables, ['x', 'y', 'z'])))]
+    
+    def limit_to_mpf_str(self, value: Any, dps: int) -> str:
+        """Convierte un límite a cadena decimal exacta para mpmath"""
+        if isinstance(value, str):
+            value = self.parse_function(value)
+        if isinstance(value, sp.Basic):
+            return str(N(value, dps + 10))
+        # str(0.1) == '0.1': se respeta el decimal que escribió el usuario
+        return str(value)
+    
+    def exact_limit(self, value: Any, extra_symbols: Tuple[str, ...] = ()) -> sp.Expr:
+        """Límite como número exacto (0.1 -> 1/10) para no arrastrar error binario"""
+        if isinstance(value, str):
+            return self.parse_function(value, extra_symbols)
+        if isinstance(value, sp.Basic):
+            return value  # ya parseado en parse_solve_request
+        return sp.Rational(str(value))
+    
+    def solve_symbolic(self, func_expr: sp.Expr, limits: Dict, coord_system: str,
+                       precision: Optional[int] = None, on_event=None) -> Dict[str, Any]:
         """Intenta resolver la integral simbólicamente"""
         try:
             start_time = time.time()
             
+            if precision:
+                limits = {coord: [self.exact_limit(value) for value in limits[coord]]
+                          for coord in ['x', 'y', 'z']}
+            
             # Transformar coordenadas
             transformed_expr, jacobian = self.coordinate_transform(func_expr, coord_system)
             integrand = transformed_expr * jacobian
             
-            # Definir variables y límites según el sistema
-            if coord_system == 'cartesian':
-                vars_order = [z, y, x]
-                limits_order = [(z, limits['z'][0], limits['z'][1]),
-                              (y, limits['y'][0], limits['y'][1]),
-                              (x, limits['x'][0], limits['x'][1])]
-            elif coord_system == 'cylindrical':
-                vars_order = [z, theta, r]
-                limits_order = [(z, limits['z'][0], limits['z'][1]),
-                              (theta, limits['y'][0], limits['y'][1]),  # theta en y
-                              (r, limits['x'][0], limits['x'][1])]      # r en x
-            else:  # spherical
-                vars_order = [phi, theta, rho]
-                limits_order = [(phi, limits['z'][0], limits['z'][1]),    # phi en z
-                              (theta, limits['y'][0], limits['y'][1]),   # theta en y
-                              (rho, limits['x'][0], limits['x'][1])]     # rho en x
+            # Definir variables y límites según el sistema (de la interior a la exterior)
+            limits_order = self.integration_order(coord_system, limits)
             
-            steps = []
+            steps = StepLog(on_event)
             steps.append(f"**Configuración Inicial**")
             steps.append(f"Función: f = {func_expr}")
             steps.append(f"Sistema: {coord_system}")
             steps.append(f"Jacobiano: |J| = {jacobian}")
             steps.append(f"Integrando: f·|J| = {integrand}")
             
+            # Con las primitivas por eje (ya conocidas si solo cambiaron los límites) cada paso es una sustitución
+            bounds, antiderivatives = self.box_antiderivatives(integrand, limits_order)
+            
             # Resolver paso a paso
             current_expr = integrand
-            
             for i, (var, lower, upper) in enumerate(limits_order):
                 steps.append(f"**Paso {i+1}: Integrar respecto a {var}**")
                 steps.append(f"∫[{lower} → {upper}] ({current_expr}) d{var}")
                 
                 # Intentar integración simbólica con timeout
                 try:
-                    integral_result = integrate(current_expr, (var, lower, upper))
+                    if antiderivatives is not None:
+                        integral_result = evaluate_on_box(antiderivatives[i], bounds[:i + 1])
+                    else:
+                        integral_result = antiderivative_memo.integrate(current_expr, var, lower, upper)
                     current_expr = simplify(integral_result)
                     steps.append(f"Resultado: {current_expr}")
+                    if on_event:
+                        on_event('partial', {'step': i + 1, 'variable': str(var),
+                                             'expression': str(current_expr), 'latex': latex(current_expr)})
                     
                     if time.time() - start_time > self.timeout:
                         raise TimeoutError("Tiempo límite excedido")
@@ -154,17 +1356,23 @@ class AdvancedIntegralSolver:
                     steps.append(f"Error en integración simbólica: {str(e)}")
                     return {'success': False, 'error': f'Error simbólico en paso {i+1}', 'steps': steps}
             
+            antiderivative_memo.save()
+            
             # Evaluar resultado final
             try:
                 if current_expr.is_number:
                     final_value = float(N(current_expr, self.precision_digits))
                 else:
                     final_value = float(N(current_expr.evalf(), self.precision_digits))
+                if not math.isfinite(final_value):
+                    # nan/oo de SymPy: integral divergente o indeterminada, que confirme el método numérico
+                    steps.append(f"Resultado simbólico no finito: {current_expr}")
+                    return {'success': False, 'error': 'Resultado simbólico no finito', 'steps': steps}
                 
                 steps.append(f"**Resultado Final**")
                 steps.append(f"Valor numérico: {final_value}")
                 
-                return {
+                result = {
                     'success': True,
                     'result': final_value,
                     'exact_result': str(current_expr),
@@ -176,6 +1384,14 @@ class AdvancedIntegralSolver:
                     'jacobian': str(jacobian)
                 }
                 
+                if precision:
+                    # El resultado exacto se evalúa directamente a la precisión pedida
+                    result['result_high_precision'] = str(N(current_expr, precision))
+                    result['precision_digits'] = precision
+                    steps.append(f"Valor con {precision} dígitos: {result['result_high_precision']}")
+                
+                return result
+                
             except Exception as e:
                 steps.append(f"Error evaluando resultado: {str(e)}")
                 return {'success': False, 'error': 'Error evaluando resultado final', 'steps': steps}
@@ -183,54 +1399,304 @@ class AdvancedIntegralSolver:
         except Exception as e:
             return {'success': False, 'error': f'Error en resolución simbólica: {str(e)}', 'steps': []}
     
-    def solve_numerical(self, func_expr: sp.Expr, limits: Dict, coord_system: str) -> Dict[str, Any]:
-        """Resolver numéricamente con alta precisión"""
+    def box_antiderivatives(self, integrand: sp.Expr, limits_order: List[Tuple[sp.Symbol, Any, Any]]):
+        """(límites como expresiones, [G₁, G₂, G₃]) si la región es una caja y el integrando las admite.
+        
+        Si no, las primitivas son None y cada paso se integra con antiderivative_memo.
+        """
+        bounds = [(var, sp.sympify(lower, strict=True), sp.sympify(upper, strict=True))
+                  for var, lower, upper in limits_order]
+        if not all(lower.is_number and upper.is_number for _, lower, upper in bounds):
+            return bounds, None
+        antiderivatives, _ = triple_antiderivatives.get_or_compute(integrand, [var for var, _, _ in bounds])
+        return bounds, antiderivatives
+    
+    def numeric_limits(self, limits: Dict) -> Dict[str, List[float]]:
+        """Límites como floats (acepta expresiones como '2*pi')"""
+        return {coord: [float(N(self.exact_limit(value))) for value in limits[coord]]
+                for coord in ['x', 'y', 'z']}
+    
+    def simplify_integrand(self, integrand: sp.Expr, limits: Dict, coord_system: str) -> sp.Expr:
+        """Simplifica el integrando transformado para cancelar singularidades removibles.
+        
+        Con r ≥ 0 / ρ ≥ 0 se cumple sqrt(ρ²) = ρ, de modo que 1/sqrt(x²+y²+z²)·ρ²sin(φ)
+        se reduce a ρ·sin(φ) y deja de ser singular en el origen.
+        """
+        radial = r if coord_system == 'cylindrical' else rho if coord_system == 'spherical' else None
+        if radial is None or limits['x'][0] < 0 or sp.count_ops(integrand) > 80:
+            return integrand
+        positive = sp.Symbol(str(radial), positive=True)
+        try:
+            return sp.simplify(integrand.subs(radial, positive)).subs(positive, radial)
+        except Exception:
+            return integrand
+    
+    def singular_factors(self, expr: sp.Expr) -> List[sp.Expr]:
+        """Subexpresiones g cuyo cero produce una singularidad (1/g, log(g), g**(1/2), tan...)"""
+        factors = []
+        for node in sp.preorder_traversal(expr):
+            if isinstance(node, sp.Pow) and node.exp.is_number and not node.exp.is_nonnegative:
+                factors.append(node.base)
+            elif isinstance(node, sp.Pow) and node.exp.is_number and not node.exp.is_integer:
+                factors.append(node.base)  # raíces: derivada singular en g = 0
+            elif isinstance(node, sp.log):
+                factors.append(node.args[0])
+            elif isinstance(node, (sp.tan, sp.sec)):
+                factors.append(cos(node.args[0]))
+            elif isinstance(node, (sp.cot, sp.csc)):
+                factors.append(sin(node.args[0]))
+        
+        unique = []
+        for factor in factors:
+            if factor.free_symbols and factor not in unique:
+                unique.append(factor)
+        return unique
+    
+    def detect_singularities(self, integrand: sp.Expr, limits: Dict, coord_system: str) -> Dict[str, Any]:
+        """Localiza singularidades del integrando dentro de la región de integración.
+        
+        Analiza denominadores, logaritmos y raíces frente a los límites, y añade como
+        candidatos las líneas singulares de las coordenadas (r = 0; ρ = 0, φ = 0, φ = π).
+        Devuelve los puntos de corte por eje que deben quedar en un extremo de subintervalo,
+        los cortes móviles de los factores de varias variables (raíces v = g(ejes exteriores),
+        p. ej. y = x para 1/sqrt(x - y)) y los ceros aislados de los que no tienen raíces
+        reales (x² + y² + z² en el origen), que integrate_singular trata con Duffy.
+        """
+        variables = self.integration_variables(coord_system)
+        coords = ['x', 'y', 'z']
+        intervals = [tuple(limits[coord]) for coord in coords]
+        breakpoints = {coord: set() for coord in coords}
+        descriptions = []
+        
+        # Valores candidatos por eje: extremos, el cero y las líneas singulares del sistema
+        candidates = []
+        for (lower, upper) in intervals:
+            values = {lower, upper}
+            if lower < 0 < upper:
+                values.add(0.0)
+            candidates.append(values)
+        coordinate_lines = {}
+        if coord_system == 'cylindrical':
+            coordinate_lines = {0: [(0.0, 'eje z (r = 0)')]}
+        elif coord_system == 'spherical':
+            coordinate_lines = {0: [(0.0, 'origen (ρ = 0)')],
+                                2: [(0.0, 'semieje z+ (φ = 0)'), (float(pi), 'semieje z- (φ = π)')]}
+        for index, lines in coordinate_lines.items():
+            lower, upper = intervals[index]
+            for value, _ in lines:
+                if lower <= value <= upper:
+                    candidates[index].add(value)
+        
+        factors = self.singular_factors(integrand)
+        moving = {coord: [] for coord in coords}
+        moving_factors, point_factors = [], []
+        
+        # Factores de varias variables: cada raíz real respecto a un eje es un corte que se
+        # mueve con los ejes exteriores. Sin raíces reales el cero es aislado (punto o línea)
+        for factor in factors:
+            used = [i for i, var in enumerate(variables) if var in factor.free_symbols]
+            if len(used) < 2 or not factor.free_symbols <= set(variables):
+                continue
+            real_roots = False
+            for index in used:
+                try:
+                    roots = sp.solve(factor, variables[index])
+                except Exception:
+                    continue
+                for root in roots:
+                    # Raíz real en puntos genéricos (sqrt(-x² - y²) solo lo es en x = y = 0)
+                    values = self.root_samples(root, variables, intervals)
+                    if not values:
+                        continue
+                    real_roots = True
+                    lower, upper = intervals[index]
+                    if root.free_symbols <= set(variables[:index]) and any(lower < value < upper for value in values):
+                        moving[coords[index]].append(root)
+                        descriptions.append(f"{factor} = 0 en {variables[index]} = {root}")
+                        if factor not in moving_factors:
+                            moving_factors.append(factor)
+            if not real_roots:
+                point_factors.append(factor)
+        
+        # Factores de una sola variable: raíces reales dentro del intervalo
+        for factor in factors:
+            used = [i for i, var in enumerate(variables) if var in factor.free_symbols]
+            if len(used) != 1 or len(factor.free_symbols) != 1:
+                continue
+            index = used[0]
+            lower, upper = intervals[index]
+            try:
+                roots = sp.solveset(factor, variables[index], sp.Interval(lower, upper))
+            except Exception:
+                continue
+            if isinstance(roots, sp.FiniteSet):
+                for root in roots:
+                    if root.is_real:
+                        candidates[index].add(float(root))
+        
+        # Evaluar cada factor en la rejilla de candidatos
+        points = []
+        for factor in factors:
+            if not factor.free_symbols <= set(variables) or factor in moving_factors:
+                continue
+            func = sp.lambdify(variables, factor, 'math')
+            for a in candidates[0]:
+                for b in candidates[1]:
+                    for c in candidates[2]:
+                        point = (a, b, c)
+                        try:
+                            value = func(a, b, c)
+                        except ZeroDivisionError:
+                            value = 0.0
+                        except (ValueError, OverflowError, TypeError):
+                            continue
+                        if abs(value) > 1e-12:
+                            continue
+                        # Solo cuentan los ejes de los que depende el factor
+                        for index, var in enumerate(variables):
+                            if var in factor.free_symbols:
+                                breakpoints[coords[index]].add(point[index])
+                        location = ', '.join(f"{var}={point[index]:g}" for index, var in enumerate(variables)
+                                             if var in factor.free_symbols)
+                        if factor in point_factors:
+                            corner = {index: point[index] for index, var in enumerate(variables)
+                                      if var in factor.free_symbols}
+                            if corner not in points:
+                                points.append(corner)
+                        description = f"{factor} = 0 en {location}"
+                        for index, lines in coordinate_lines.items():
+                            for value_line, name in lines:
+                                if variables[index] in factor.free_symbols and point[index] == value_line:
+                                    description += f" [{name}]"
+                        if description not in descriptions:
+                            descriptions.append(description)
+        
+        return {
+            'found': any(breakpoints.values()) or any(moving.values()),
+            'breakpoints': {coord: sorted(values)[:SINGULARITY_MAX_BREAKPOINTS]
+                            for coord, values in breakpoints.items()},
+            'moving': moving,
+            'points': points,
+            'descriptions': descriptions
+        }
+    
+    @staticmethod
+    def root_samples(root: sp.Expr, variables, intervals) -> List[float]:
+        """Valores reales y finitos de root en una rejilla de puntos genéricos (no en 0 ni en los extremos)"""
+        used = [index for index, var in enumerate(variables) if var in root.free_symbols]
+        func = sp.lambdify([variables[index] for index in used], root, 'math')
+        fractions = (np.arange(SINGULARITY_ROOT_SAMPLES) + 0.377) / SINGULARITY_ROOT_SAMPLES
+        samples = [intervals[index][0] + (intervals[index][1] - intervals[index][0]) * fractions for index in used]
+        values = []
+        for point in itertools.product(*samples):
+            try:
+                value = func(*point)
+            except (ValueError, ZeroDivisionError, OverflowError, TypeError):
+                continue
+            if not isinstance(value, complex) and math.isfinite(value):
+                values.append(float(value))
+        return values
+    
+    def graded_segments(self, lower: float, upper: float, breakpoints: List[float]) -> List[Tuple[float, float, str]]:
+        """Divide [lower, upper] en los puntos singulares y marca qué extremos son singulares"""
+        points = sorted({lower, upper, *[p for p in breakpoints if lower <= p <= upper]})
+        singular = set(breakpoints)
+        segments = []
+        for c, d in zip(points[:-1], points[1:]):
+            left, right = c in singular, d in singular
+            kind = 'both' if left and right else 'left' if left else 'right' if right else 'none'
+            segments.append((c, d, kind))
+        return segments
+    
+    def solve_numerical(self, func_expr: sp.Expr, limits: Dict, coord_system: str,
+                        engine: str = 'auto') -> Dict[str, Any]:
+        """Resolver numéricamente con alta precisión.
+        
+        engine: 'nested' (eje interior vectorizado), 'tplquad' (tres quad escalares) o 'auto',
+        que usa el anidado salvo con singularidades o si no converge.
+        """
+        singularities = {'descriptions': []}  # también se informan si se agota el tiempo
         try:
             start_time = time.time()
+            deadline = start_time + self.timeout
+            limits = self.numeric_limits(limits)
             
             # Transformar a función numérica
             transformed_expr, jacobian = self.coordinate_transform(func_expr, coord_system)
             integrand = transformed_expr * jacobian
             
-            # Convertir a función lambda para SciPy
-            if coord_system == 'cartesian':
-                func_lambda = sp.lambdify((x, y, z), integrand, 'numpy')
-                
-                def integrand_func(z_val, y_val, x_val):
-                    try:
-                        result = func_lambda(x_val, y_val, z_val)
-                        return np.real(result) if np.isfinite(result) else 0.0
-                    except:
-                        return 0.0
-                        
-            elif coord_system == 'cylindrical':
-                func_lambda = sp.lambdify((r, theta, z), integrand, 'numpy')
-                
-                def integrand_func(z_val, theta_val, r_val):
-                    try:
-                        result = func_lambda(r_val, theta_val, z_val)
-                        return np.real(result) if np.isfinite(result) else 0.0
-                    except:
-                        return 0.0
-                        
-            else:  # spherical
-                func_lambda = sp.lambdify((rho, theta, phi), integrand, 'numpy')
+            # Detección de singularidades (tras cancelar las removibles)
+            singularities = self.detect_singularities(integrand, limits, coord_system)
+            if singularities['found']:
+                integrand = self.simplify_integrand(integrand, limits, coord_system)
+                singularities = self.detect_singularities(integrand, limits, coord_system)
+            
+            # Convertir a función lambda para SciPy (argumentos en orden x, y, z de los límites)
+            func_lambda = compiled_integrands.lambdify(self.integration_variables(coord_system), integrand)
+            non_finite = [0]
+            evaluations = [0]
+            
+            def evaluate(a_val, b_val, c_val):
+                evaluations[0] += 1
+                if evaluations[0] % NUMERICAL_DEADLINE_CHECK_EVERY == 0 and time.time() > deadline:
+                    raise TimeoutError(f"Tiempo límite excedido ({self.timeout} s, "
+                                       f"{evaluations[0]} evaluaciones)")
+                try:
+                    result = func_lambda(a_val, b_val, c_val)
+                except (ValueError, ZeroDivisionError, OverflowError):
+                    result = np.nan
+                if not np.isfinite(result):
+                    # Un punto aislado no cambia la integral, pero se informa
+                    non_finite[0] += 1
+                    return 0.0
+                return float(np.real(result))
+            
+            nested = None
+            if not singularities['found'] and engine != 'tplquad':
+                nested = self.nested_quadrature(func_lambda, limits, epsabs=1e-12, epsrel=1e-10, deadline=deadline)
+                if not nested['converged'] and engine == 'auto':
+                    nested = None  # p. ej. oscilaciones rápidas en z: se recurre a tplquad
+            
+            if nested is not None:
+                result, error = nested['result'], nested['error']
+                evaluations[0] = nested['evaluations']
+                non_finite[0] = nested['non_finite']
+                algorithm = (f"Anidada: Gauss-Kronrod adaptativo en x, y; Gauss-Legendre vectorizado "
+                             f"de {NESTED_INNER_NODES} nodos en z ({nested['panels']} paneles)")
+            elif not singularities['found']:
+                def integrand_func(c_val, b_val, a_val):
+                    return evaluate(a_val, b_val, c_val)
                 
-                def integrand_func(phi_val, theta_val, rho_val):
-                    try:
-                        result = func_lambda(rho_val, theta_val, phi_val)
-                        return np.real(result) if np.isfinite(result) else 0.0
-                    except:
-                        return 0.0
-            
-            # Integración numérica triple
-            result, error = scipy_integrate.tplquad(
-                integrand_func,
-                limits['x'][0], limits['x'][1],
-                lambda x: limits['y'][0], lambda x: limits['y'][1],
-                lambda x, y: limits['z'][0], lambda x, y: limits['z'][1],
-                epsabs=1e-12, epsrel=1e-10
-            )
+                # Integración numérica triple
+                result, error = scipy_integrate.tplquad(
+                    integrand_func,
+                    limits['x'][0], limits['x'][1],
+                    lambda x: limits['y'][0], lambda x: limits['y'][1],
+                    lambda x, y: limits['z'][0], lambda x, y: limits['z'][1],
+                    epsabs=1e-12, epsrel=1e-10
+                )
+                algorithm = "Cuadratura adaptativa de Gauss-Kronrod"
+            else:
+                result, error, num_boxes = self.integrate_singular(
+                    evaluate, limits, singularities, self.integration_variables(coord_system))
+                algorithm = (f"Gauss-Kronrod con cambio de variable graduado hacia las singularidades "
+                             f"({num_boxes} subregiones"
+                             f"{', Duffy en las singularidades puntuales' if singularities['points'] else ''})")
+            
+            # Un error estimado del orden del resultado indica divergencia (p. ej. 1/(x-0.5)),
+            # no una aproximación útil
+            if not np.isfinite(result) or not np.isfinite(error) \
+                    or error > NUMERICAL_MAX_RELATIVE_ERROR * max(abs(result), 1.0):
+                return {
+                    'success': False,
+                    'error': (f'La integral no converge (posiblemente divergente): '
+                              f'estimación {result:.6g} ± {error:.2e}'),
+                    'singularities': singularities['descriptions'],
+                    'evaluations': evaluations[0],
+                    'steps': [f"Singularidad detectada: {description}"
+                              for description in singularities['descriptions']],
+                    'execution_time': time.time() - start_time
+                }
             
             steps = [
                 f"**Método Numérico de Alta Precisión**",
@@ -239,18 +1705,33 @@ class AdvancedIntegralSolver:
                 f"Jacobiano: |J| = {jacobian}",
                 f"Integrando: f·|J| = {integrand}",
                 f"Límites: x∈[{limits['x'][0]}, {limits['x'][1]}], y∈[{limits['y'][0]}, {limits['y'][1]}], z∈[{limits['z'][0]}, {limits['z'][1]}]",
-                f"Algoritmo: Cuadratura adaptativa de Gauss-Kronrod",
+            ]
+            for description in singularities['descriptions']:
+                steps.append(f"Singularidad detectada: {description}")
+            steps.extend([
+                f"Algoritmo: {algorithm}",
                 f"Tolerancia absoluta: 1e-12",
                 f"Tolerancia relativa: 1e-10",
                 f"**Resultado: {result:.12f}**",
-                f"Error estimado: ±{error:.2e}"
-            ]
+                f"Error estimado: ±{error:.2e}",
+                f"Evaluaciones del integrando: {evaluations[0]}"
+            ])
+            if nested is not None and not nested['converged']:
+                steps.append("Advertencia: el eje interior no alcanzó la tolerancia pedida")
+            if non_finite[0]:
+                steps.append(f"Advertencia: {non_finite[0]} evaluaciones no finitas tratadas como 0")
             
             return {
                 'success': True,
                 'result': float(result),
                 'error_estimate': float(error),
                 'method': 'Numérico (Gauss-Kronrod)',
+                'singularities': singularities['descriptions'],
+                'non_finite_evaluations': non_finite[0],
+                'evaluations': evaluations[0],
+                # Llamadas al integrando desde Python: una por punto con tplquad, una por (x, y) anidado
+                'python_calls': nested['python_calls'] if nested is not None else evaluations[0],
+                'numerical_engine': 'nested' if nested is not None else 'tplquad',
                 'steps': steps,
                 'execution_time': time.time() - start_time,
                 'coordinate_system': coord_system,
@@ -258,30 +1739,528 @@ class AdvancedIntegralSolver:
             }
             
         except Exception as e:
-            return {'success': False, 'error': f'Error en resolución numérica: {str(e)}', 'steps': []}
+            return {'success': False, 'error': f'Error en resolución numérica: {str(e)}',
+                    'singularities': singularities['descriptions'],
+                    'steps': [f"Singularidad detectada: {description}"
+                              for description in singularities['descriptions']]}
+    
+    def nested_quadrature(self, func_lambda, limits: Dict[str, List[float]],
+                          epsabs: float, epsrel: float, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Cuadratura anidada: adaptativa en x e y, Gauss-Legendre vectorizado en z.
+        
+        Para cada (x, y) el eje interior se resuelve con una sola llamada a NumPy sobre todos
+        los nodos (32 + 16 por panel); si la diferencia entre ambas reglas supera la tolerancia
+        se duplican los paneles. epsabs se reparte entre niveles según NESTED_ERROR_SHARES
+        (escalado por la longitud o el área que integra cada nivel) y epsrel se aplica igual
+        en todos. Devuelve también el número de evaluaciones y de llamadas desde Python.
+        Pasado deadline (time.time()) lanza TimeoutError.
+        """
+        (a0, a1), (b0, b1), (c0, c1) = limits['x'], limits['y'], limits['z']
+        length_a, length_b = abs(a1 - a0), abs(b1 - b0)
+        outer_tol = epsabs * NESTED_ERROR_SHARES['outer']
+        middle_tol = epsabs * NESTED_ERROR_SHARES['middle'] / max(length_a, 1e-300)
+        inner_tol = epsabs * NESTED_ERROR_SHARES['inner'] / max(length_a * length_b, 1e-300)
+        
+        high_nodes, high_weights = np.polynomial.legendre.leggauss(NESTED_INNER_NODES)
+        low_nodes, low_weights = np.polynomial.legendre.leggauss(NESTED_INNER_NODES // 2)
+        stats = {'evaluations': 0, 'python_calls': 0, 'non_finite': 0,
+                 'panels': 1, 'inner_error': 0.0, 'middle_error': 0.0, 'converged': True}
+        
+        def inner(a_val, b_val):
+            if deadline is not None and time.time() > deadline:
+                raise TimeoutError(f"Tiempo límite excedido ({stats['evaluations']} evaluaciones)")
+            panels = stats['panels']  # se parte de los paneles que necesitó el punto anterior
+            while True:
+                edges = np.linspace(c0, c1, panels + 1)
+                half = (edges[1] - edges[0]) / 2
+                centers = (edges[:-1] + edges[1:]) / 2
+                nodes = np.concatenate([(centers[:, None] + half * high_nodes).ravel(),
+                                        (centers[:, None] + half * low_nodes).ravel()])
+                with np.errstate(all='ignore'):
+                    values = np.real(np.asarray(func_lambda(a_val, b_val, nodes))) * np.ones_like(nodes)
+                finite = np.isfinite(values)
+                stats['non_finite'] += int(np.count_nonzero(~finite))
+                values = np.where(finite, values, 0.0)
+                stats['evaluations'] += nodes.size
+                stats['python_calls'] += 1
+                
+                split = panels * len(high_nodes)
+                high = half * np.sum(values[:split].reshape(panels, -1) @ high_weights)
+                low = half * np.sum(values[split:].reshape(panels, -1) @ low_weights)
+                error = abs(high - low)
+                tolerance = max(inner_tol, epsrel * abs(high))
+                if error <= tolerance or panels >= NESTED_MAX_PANELS:
+                    if error > tolerance:
+                        stats['converged'] = False
+                    stats['panels'] = panels
+                    stats['inner_error'] = max(stats['inner_error'], error)
+                    return high
+                panels *= 2
+        
+        def middle(a_val):
+            value, error = scipy_integrate.quad(lambda b_val: inner(a_val, b_val), b0, b1,
+                                                epsabs=middle_tol, epsrel=epsrel, limit=100)
+            stats['middle_error'] = max(stats['middle_error'], error)
+            return value
+        
+        result, outer_error = scipy_integrate.quad(middle, a0, a1, epsabs=outer_tol, epsrel=epsrel, limit=100)
+        error = outer_error + stats['middle_error'] * length_a + stats['inner_error'] * length_a * length_b
+        return {'result': result, 'error': error, **stats}
+    
+    @staticmethod
+    def graded_map(c: float, d: float, kind: str):
+        """Cambio de variable de [0, 1] a [c, d]: (u ↦ (v, dv/du), v ↦ u)"""
+        h = d - c
+        if kind == 'left':
+            return (lambda u: (c + h * u * u, 2 * h * u)), (lambda v: math.sqrt(max((v - c) / h, 0.0)))
+        if kind == 'right':
+            return (lambda u: (d - h * (1 - u) ** 2, 2 * h * (1 - u))), (lambda v: 1 - math.sqrt(max((d - v) / h, 0.0)))
+        if kind == 'both':
+            # Inversa de u²(3 - 2u) = t: u = 1/2 - sin(asin(1 - 2t)/3)
+            return ((lambda u: (c + h * u * u * (3 - 2 * u), 6 * h * u * (1 - u))),
+                    (lambda v: 0.5 - math.sin(math.asin(min(max(1 - 2 * (v - c) / h, -1.0), 1.0)) / 3)))
+        return (lambda u: (c + h * u, h)), (lambda v: (v - c) / h)
+    
+    def integrate_singular(self, evaluate, limits: Dict, singularities: Dict[str, Any],
+                           variables: List[sp.Symbol]) -> Tuple[float, float, int]:
+        """Integra por subregiones con un cambio de variable que anula el integrando en los puntos singulares.
+        
+        En cada segmento [c, d] se usa v = c + (d-c)·u² si la singularidad está en c
+        (y los análogos para d o ambos extremos). El jacobiano 2(d-c)·u compensa
+        singularidades del tipo 1/sqrt o 1/r y QUADPACK converge sin subdividir sin fin.
+        Los cortes móviles (v = g(ejes exteriores)) se pasan a QUADPACK como puntos de ruptura
+        de ese eje. En las cajas con una singularidad puntual en un vértice el graduado por
+        ejes no basta (1/(x² + y² + z²) sigue sin estar acotado) y se usa la transformación
+        de Duffy: la caja se divide en una pirámide por eje, con u_k = s y u_j = s·t_j, cuyo
+        jacobiano s^(m-1) anula singularidades del tipo 1/r^α con α < m ejes.
+        """
+        coords = ['x', 'y', 'z']
+        moving = [[sp.lambdify(variables[:index], root, 'math') for root in singularities['moving'][coord]]
+                  for index, coord in enumerate(coords)]
+        segments = [self.graded_segments(*limits[coord], singularities['breakpoints'][coord]) for coord in coords]
+        options = {'epsabs': 1e-12, 'epsrel': 1e-10, 'limit': 100}
+        
+        total, total_error, num_boxes = 0.0, 0.0, 0
+        for box in itertools.product(*segments):
+            maps = [self.graded_map(*segment) for segment in box]
+            corner = next((point for point in singularities['points']
+                           if all(value in box[index][:2] for index, value in point.items())), None)
+            
+            if corner is None:
+                def mapped(w, v, u, maps=maps):
+                    (a_val, da), (b_val, db), (c_val, dc) = maps[0][0](u), maps[1][0](v), maps[2][0](w)
+                    return evaluate(a_val, b_val, c_val) * da * db * dc
+                
+                def break_points(index, *outer, maps=maps):
+                    """Cortes móviles del eje index en la variable local, dadas las locales exteriores"""
+                    actual = [maps[i][0](value)[0] for i, value in zip(reversed(range(index)), outer)][::-1]
+                    found = []
+                    for root in moving[index]:
+                        try:
+                            local = maps[index][1](float(root(*actual)))
+                        except (ValueError, ZeroDivisionError, OverflowError, TypeError):
+                            continue
+                        if 1e-12 < local < 1 - 1e-12:
+                            found.append(local)
+                    return {**options, 'points': found} if found else options
+                
+                value, error = scipy_integrate.nquad(
+                    mapped, [[0, 1]] * 3,
+                    opts=[lambda v, u: break_points(2, v, u), lambda u: break_points(1, u), break_points(0)])
+                total, total_error, num_boxes = total + value, total_error + error, num_boxes + 1
+                continue
+            
+            # Duffy: vértice singular en el origen local de los ejes de corner
+            axes = sorted(corner)
+            spans = {index: (corner[index], box[index][1] if corner[index] == box[index][0] else box[index][0])
+                     for index in axes}
+            for apex in axes:
+                def mapped(w, v, u, maps=maps, apex=apex):
+                    local = (u, v, w)
+                    point, jacobian = [0.0] * 3, local[apex] ** (len(axes) - 1)
+                    for index in range(3):
+                        if index in spans:
+                            start, end = spans[index]
+                            fraction = local[index] if index == apex else local[apex] * local[index]
+                            point[index] = start + (end - start) * fraction
+                            jacobian *= abs(end - start)
+                        else:
+                            point[index], derivative = maps[index][0](local[index])
+                            jacobian *= derivative
+                    return evaluate(*point) * jacobian
+                
+                value, error = scipy_integrate.nquad(mapped, [[0, 1]] * 3, opts=[options] * 3)
+                total, total_error, num_boxes = total + value, total_error + error, num_boxes + 1
+        return total, total_error, num_boxes
+    
+    def hp_tensor_sum(self, integrand: sp.Expr, var_names: Tuple[str, ...], dps: int,
+                      node_sets: List[List[Tuple[str, str]]], deadline: float) -> Tuple[str, int]:
+        """Suma del producto tensorial, repartiendo los nodos exteriores entre procesos"""
+        outer_nodes, middle_nodes, inner_nodes = node_sets
+        evaluations = len(outer_nodes) * len(middle_nodes) * len(inner_nodes)
+        pool = get_hp_process_pool() if evaluations >= HP_PARALLEL_MIN_EVALUATIONS else None
+        
+        if pool is None:
+            with _hp_inline_lock:
+                return hp_partial_sum(integrand, var_names, dps, outer_nodes, middle_nodes, inner_nodes)
+        
+        num_chunks = min(len(outer_nodes), HP_WORKERS * 2)
+        chunks = [outer_nodes[i::num_chunks] for i in range(num_chunks)]
+        futures = [pool.submit(hp_partial_sum, integrand, var_names, dps, chunk, middle_nodes, inner_nodes)
+                   for chunk in chunks]
+        
+        ctx = mpmath.MPContext()
+        ctx.dps = dps + 10
+        total = ctx.mpf(0)
+        non_finite = 0
+        for future in futures:
+            partial, partial_non_finite = future.result(timeout=max(1.0, deadline - time.time()))
+            total += ctx.mpf(partial)
+            non_finite += partial_non_finite
+        return ctx.nstr(total, dps + 10), non_finite
     
-    def solve_triple_integral(self, function: str, limits: Dict, coord_system: str = 'cartesian') -> Dict[str, Any]:
+    def solve_high_precision(self, func_expr: sp.Expr, limits: Dict, coord_system: str,
+                             precision: int, method: Optional[str] = None) -> Dict[str, Any]:
+        """Resolver numéricamente con precisión arbitraria (mpmath)"""
+        try:
+            start_time = time.time()
+            deadline = start_time + self.timeout
+            
+            transformed_expr, jacobian = self.coordinate_transform(func_expr, coord_system)
+            integrand = transformed_expr * jacobian
+            var_names = tuple(str(var) for var in self.integration_variables(coord_system))
+            dps = precision + 5  # dígitos de guarda
+            
+            # Las singularidades se colocan en extremos de subintervalo; tanh-sinh las tolera
+            float_limits = self.numeric_limits(limits)
+            singularities = self.detect_singularities(integrand, float_limits, coord_system)
+            if singularities['found']:
+                integrand = self.simplify_integrand(integrand, float_limits, coord_system)
+                singularities = self.detect_singularities(integrand, float_limits, coord_system)
+            # Por defecto tanh-sinh solo en los ejes singulares; Gauss-Legendre en el resto
+            axis_methods = []
+            for coord in ['x', 'y', 'z']:
+                singular_axis = bool(singularities['breakpoints'][coord])
+                axis_methods.append(method or ('tanh-sinh' if singular_axis else 'gauss-legendre'))
+            for axis_method in axis_methods:
+                if axis_method not in HP_QUADRATURE_RULES:
+                    raise ValueError(f"Cuadratura no soportada: {axis_method}")
+            method = '/'.join(sorted(set(axis_methods)))
+            
+            axes = []
+            for coord in ['x', 'y', 'z']:
+                lower = self.limit_to_mpf_str(limits[coord][0], dps)
+                upper = self.limit_to_mpf_str(limits[coord][1], dps)
+                inner_points = [repr(p) for p in singularities['breakpoints'][coord]
+                                if float_limits[coord][0] < p < float_limits[coord][1]]
+                points = [lower, *inner_points, upper]
+                axes.append(list(zip(points[:-1], points[1:])))
+            
+            ctx = mpmath.MPContext()
+            ctx.dps = dps + 10
+            tolerance = ctx.mpf(10) ** (-precision)
+            
+            previous = None
+            estimate = None
+            error = None
+            converged = False
+            evaluations = 0
+            non_finite = 0
+            # Nivel 1 = Gauss-Legendre grado 2 (6 nodos) o tanh-sinh grado 1
+            offsets = [0 if axis_method == 'tanh-sinh' else 1 for axis_method in axis_methods]
+            max_level = min(HP_MAX_DEGREE[m] - o for m, o in zip(axis_methods, offsets))
+            
+            for level in range(1, max_level + 1):
+                node_sets = [get_hp_axis_nodes(axis, axis_method, level + offset, dps)
+                             for axis, axis_method, offset in zip(axes, axis_methods, offsets)]
+                total, non_finite = self.hp_tensor_sum(integrand, var_names, dps, node_sets, deadline)
+                evaluations += len(node_sets[0]) * len(node_sets[1]) * len(node_sets[2])
+                estimate = ctx.mpf(total)
+                
+                if previous is not None:
+                    error = abs(estimate - previous)
+                    if error <= tolerance * max(1, abs(estimate)):
+                        converged = True
+                        break
+                previous = estimate
+                
+                if time.time() > deadline:
+                    break
+            
+            if error is None:
+                raise TimeoutError("Tiempo límite excedido antes de estimar el error")
+            
+            high_precision_value = ctx.nstr(estimate, precision)
+            
+            steps = [
+                f"**Método Numérico de Precisión Arbitraria**",
+                f"Función: f = {func_expr}",
+                f"Sistema: {coord_system}",
+                f"Jacobiano: |J| = {jacobian}",
+                f"Integrando: f·|J| = {integrand}",
+                f"Algoritmo: Cuadratura {method} (mpmath) en producto tensorial",
+                *[f"Singularidad detectada: {description}" for description in singularities['descriptions']],
+                f"Precisión solicitada: {precision} dígitos",
+                f"Evaluaciones del integrando: {evaluations}",
+                f"**Resultado: {high_precision_value}**",
+                f"Error estimado: ±{ctx.nstr(error, 3)}"
+            ]
+            if not converged:
+                steps.append("Advertencia: no se alcanzó la precisión solicitada")
+            if non_finite:
+                steps.append(f"Advertencia: {non_finite} evaluaciones no finitas omitidas")
+            
+            return {
+                'success': True,
+                'result': float(estimate),
+                'result_high_precision': high_precision_value,
+                'precision_digits': precision,
+                'converged': converged,
+                'error_estimate': float(error),
+                'evaluations': evaluations,
+                'method': f'Numérico de precisión arbitraria ({method})',
+                'singularities': singularities['descriptions'],
+                'non_finite_evaluations': non_finite,
+                'steps': steps,
+                'execution_time': time.time() - start_time,
+                'coordinate_system': coord_system,
+                'jacobian': str(jacobian)
+            }
+            
+        except Exception as e:
+            return {'success': False, 'error': f'Error en resolución de alta precisión: {str(e)}', 'steps': []}
+    
+    def quick_estimate(self, func_expr: sp.Expr, limits: Dict, coord_system: str, points: int) -> float:
+        """Estimación rápida con Gauss-Legendre tensorial vectorizado (points³ evaluaciones)"""
+        transformed_expr, jacobian = self.coordinate_transform(func_expr, coord_system)
+        func_lambda = compiled_integrands.lambdify(self.integration_variables(coord_system), transformed_expr * jacobian)
+        limits = self.numeric_limits(limits)
+        
+        nodes, weights = np.polynomial.legendre.leggauss(points)
+        axis_nodes, axis_weights = [], []
+        for coord in ['x', 'y', 'z']:
+            lower, upper = limits[coord]
+            axis_nodes.append((upper - lower) / 2 * nodes + (upper + lower) / 2)
+            axis_weights.append((upper - lower) / 2 * weights)
+        
+        A, B, C = np.meshgrid(*axis_nodes, indexing='ij')
+        W = np.einsum('i,j,k->ijk', *axis_weights)
+        with np.errstate(all='ignore'):
+            F = np.real(func_lambda(A, B, C)) * np.ones_like(A)
+        F = np.where(np.isfinite(F), F, 0.0)
+        return float(np.sum(W * F))
+    
+    def qmc_estimate(self, func_expr: sp.Expr, limits: Dict, coord_system: str,
+                     points: int, replicates: int) -> Dict[str, float]:
+        """Quasi-Monte Carlo con Sobol aleatorizado: media de réplicas independientes y su error típico.
+        
+        No comparte nodos ni reglas con los métodos deterministas, así que sirve para
+        verificarlos. Los puntos no finitos se cuentan en vez de tratarse como 0 en silencio.
+        """
+        transformed_expr, jacobian = self.coordinate_transform(func_expr, coord_system)
+        func_lambda = compiled_integrands.lambdify(self.integration_variables(coord_system),
+                                                   transformed_expr * jacobian)
+        limits = self.numeric_limits(limits)
+        lower = np.array([limits[coord][0] for coord in ['x', 'y', 'z']])
+        upper = np.array([limits[coord][1] for coord in ['x', 'y', 'z']])
+        volume = float(np.prod(upper - lower))
+        
+        estimates, non_finite = [], 0
+        for seed in range(replicates):
+            sample = qmc.scale(qmc.Sobol(d=3, scramble=True, seed=seed).random(points), lower, upper)
+            with np.errstate(all='ignore'):
+                F = np.real(np.asarray(func_lambda(sample[:, 0], sample[:, 1], sample[:, 2]))) * np.ones(points)
+            finite = np.isfinite(F)
+            non_finite += int(np.count_nonzero(~finite))
+            estimates.append(volume * float(np.mean(np.where(finite, F, 0.0))))
+        
+        return {'value': float(np.mean(estimates)),
+                'error_estimate': float(np.std(estimates, ddof=1) / math.sqrt(replicates)),
+                'evaluations': points * replicates,
+                'non_finite': non_finite}
+    
+    def solve_sweep(self, function: str, limits: Dict, coord_system: str,
+                    parameter: str, values: List[float]) -> Dict[str, Any]:
+        """Resuelve la integral para cada valor de un parámetro de la función o de los límites.
+        
+        Se intenta una sola integración simbólica con el parámetro libre y la forma cerrada se
+        evalúa vectorizada sobre todos los valores; si no existe, se usa Gauss-Legendre
+        tensorial en lote (todas las integrales en unas pocas llamadas a NumPy).
+        """
+        try:
+            start_time = time.time()
+            extra_symbols = (parameter,)
+            param = sp.Symbol(parameter)
+            func_expr = self.parse_function(function, extra_symbols)
+            limits = {coord: [self.exact_limit(value, extra_symbols) for value in limits[coord]]
+                      for coord in ['x', 'y', 'z']}
+            values_array = np.asarray(values, dtype=float)
+            
+            steps = [f"**Barrido paramétrico**",
+                     f"Función: f = {func_expr}",
+                     f"Parámetro: {parameter} ({len(values)} valores entre {values_array.min()} y {values_array.max()})"]
+            
+            closed_form = None
+            try:
+                closed_form = self.sweep_closed_form(func_expr, limits, coord_system, start_time)
+            except Exception as e:
+                steps.append(f"Error en integración simbólica: {str(e)}")
+            
+            if closed_form is not None:
+                with np.errstate(all='ignore'):
+                    evaluated = np.asarray(sp.lambdify(param, closed_form, 'numpy')(values_array), dtype=complex)
+                evaluated = evaluated * np.ones_like(values_array)
+                real_valued = np.abs(evaluated.imag) <= 1e-12 * np.maximum(1.0, np.abs(evaluated.real))
+                results = np.where(real_valued, evaluated.real, np.nan)
+                errors = None
+                method = 'Simbólico'
+                steps.append(f"Forma cerrada: I({parameter}) = {closed_form}")
+                steps.append(f"Evaluada vectorizada en {len(values)} valores")
+                
+                # La forma genérica puede no estar definida en valores especiales (p. ej. k = 0)
+                undefined = ~np.isfinite(results)
+                if undefined.any():
+                    results[undefined], special_errors = self.sweep_numerical(
+                        func_expr, limits, coord_system, param, values_array[undefined])
+                    errors = np.where(undefined, 0.0, np.nan)
+                    errors[undefined] = special_errors
+                    method = 'Simbólico + numérico en valores especiales'
+                    steps.append(f"{int(undefined.sum())} valores sin forma cerrada resueltos numéricamente")
+            else:
+                results, errors = self.sweep_numerical(func_expr, limits, coord_system, param, values_array)
+                method = f'Numérico (Gauss-Legendre {SWEEP_POINTS}³ en lote)'
+                steps.append("Sin forma cerrada: Gauss-Legendre tensorial en lote para todos los valores")
+                steps.append(f"Error estimado máximo: ±{np.nanmax(errors):.2e}")
+            
+            def to_json(array):
+                return [float(value) if np.isfinite(value) else None for value in array]
+            
+            result = {
+                'success': True,
+                'parameter': parameter,
+                'values': to_json(values_array),
+                'results': to_json(results),
+                'method': method,
+                'steps': steps,
+                'execution_time': time.time() - start_time,
+                'coordinate_system': coord_system,
+                # Serie lista para Plotly
+                'series': {'type': 'scatter', 'mode': 'lines+markers', 'name': f'I({parameter})',
+                           'x': to_json(values_array), 'y': to_json(results)}
+            }
+            if closed_form is not None:
+                result['closed_form'] = str(closed_form)
+                result['latex_closed_form'] = latex(closed_form)
+            if errors is not None:
+                result['error_estimates'] = to_json(errors)  # null donde el valor es exacto
+            return result
+            
+        except Exception as e:
+            return {'success': False, 'error': f'Error en barrido paramétrico: {str(e)}', 'steps': []}
+    
+    def sweep_closed_form(self, func_expr: sp.Expr, limits: Dict, coord_system: str,
+                          start_time: float) -> Optional[sp.Expr]:
+        """Integral simbólica con el parámetro libre, o None si SymPy no la resuelve.
+        
+        Con conds='none' SymPy devuelve el caso genérico en lugar de un Piecewise por cada
+        condición sobre el parámetro (que además hace muy lento simplify); los valores
+        donde esa forma no está definida se resuelven numéricamente en solve_sweep.
+        """
+        transformed_expr, jacobian = self.coordinate_transform(func_expr, coord_system)
+        current_expr = transformed_expr * jacobian
+        for var, lower, upper in self.integration_order(coord_system, limits):
+            current_expr = simplify(integrate(current_expr, (var, lower, upper), conds='none'))
+            if current_expr.has(sp.Integral):
+                return None
+            if time.time() - start_time > self.timeout:
+                raise TimeoutError("Tiempo límite excedido")
+        return current_expr
+    
+    def sweep_numerical(self, func_expr: sp.Expr, limits: Dict, coord_system: str,
+                        param: sp.Symbol, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Gauss-Legendre tensorial para todos los valores a la vez; error = |n - n/2 nodos|"""
+        transformed_expr, jacobian = self.coordinate_transform(func_expr, coord_system)
+        variables = self.integration_variables(coord_system)
+        func_lambda = sp.lambdify((*variables, param), transformed_expr * jacobian, 'numpy')
+        limit_lambdas = [[sp.lambdify(param, bound, 'numpy') for bound in limits[coord]]
+                         for coord in ['x', 'y', 'z']]
+        
+        def tensor_rule(points):
+            nodes, weights = np.polynomial.legendre.leggauss(points)
+            chunk_size = max(1, SWEEP_MAX_CHUNK_POINTS // points ** 3)
+            totals = []
+            for start in range(0, len(values), chunk_size):
+                chunk = values[start:start + chunk_size]
+                axis_nodes, axis_weights = [], []
+                for lower_lambda, upper_lambda in limit_lambdas:
+                    lower = np.broadcast_to(np.asarray(lower_lambda(chunk), dtype=float), chunk.shape)
+                    upper = np.broadcast_to(np.asarray(upper_lambda(chunk), dtype=float), chunk.shape)
+                    half, center = (upper - lower) / 2, (upper + lower) / 2
+                    axis_nodes.append(half[:, None] * nodes + center[:, None])
+                    axis_weights.append(half[:, None] * weights)
+                # Forma (valores, n, n, n) por broadcasting
+                A = axis_nodes[0][:, :, None, None]
+                B = axis_nodes[1][:, None, :, None]
+                C = axis_nodes[2][:, None, None, :]
+                W = axis_weights[0][:, :, None, None] * axis_weights[1][:, None, :, None] * axis_weights[2][:, None, None, :]
+                with np.errstate(all='ignore'):
+                    F = np.real(np.asarray(func_lambda(A, B, C, chunk[:, None, None, None]))) * np.ones_like(W)
+                F = np.where(np.isfinite(F), F, 0.0)
+                totals.append(np.sum(W * F, axis=(1, 2, 3)))
+            return np.concatenate(totals)
+        
+        fine = tensor_rule(SWEEP_POINTS)
+        coarse = tensor_rule(SWEEP_POINTS // 2)
+        return fine, np.abs(fine - coarse)
+    
+    def solve_triple_integral(self, function: str, limits: Dict, coord_system: str = 'cartesian',
+                              precision: Optional[int] = None,
+                              quadrature: Optional[str] = None, on_event=None,
+                              numerical_engine: str = 'auto') -> Dict[str, Any]:
         """Método principal para resolver integrales triples"""
         try:
             # Parsear función
             func_expr = self.parse_function(function)
             
             # Intentar resolución simbólica primero
-            symbolic_result = self.solve_symbolic(func_expr, limits, coord_system)
+            symbolic_result = self.solve_symbolic(func_expr, limits, coord_system, precision, on_event)
             
             if symbolic_result['success']:
                 return symbolic_result
             
-            # Si falla simbólico, usar numérico
+            # Si falla simbólico, usar numérico (de precisión arbitraria si se pidió)
             print(f"Resolución simbólica falló, usando método numérico...")
-            numerical_result = self.solve_numerical(func_expr, limits, coord_system)
+            if on_event:
+                # Estimaciones intermedias baratas mientras corre el método preciso
+                on_event('fallback', {'reason': symbolic_result.get('error', 'No disponible')})
+                previous = None
+                for points in STREAM_ESTIMATE_POINTS:
+                    try:
+                        estimate = self.quick_estimate(func_expr, limits, coord_system, points)
+                    except Exception as e:
+                        # Son solo orientativas: si fallan (overflow, dominio...) sigue el método preciso
+                        print(f"Estimación intermedia Gauss-Legendre {points}³ fallida: {e}")
+                        break
+                    on_event('estimate', {
+                        'result': estimate,
+                        'error_estimate': abs(estimate - previous) if previous is not None else None,
+                        'method': f'Gauss-Legendre {points}³'
+                    })
+                    previous = estimate
+            if precision:
+                numerical_result = self.solve_high_precision(func_expr, limits, coord_system, precision, quadrature)
+            else:
+                numerical_result = self.solve_numerical(func_expr, limits, coord_system, numerical_engine)
             
             if numerical_result['success']:
                 # Combinar información de ambos métodos
                 numerical_result['symbolic_attempt'] = symbolic_result.get('error', 'No disponible')
                 return numerical_result
             
-            return {'success': False, 'error': 'Ambos métodos fallaron', 'steps': []}
+            return {'success': False, 'error': 'Ambos métodos fallaron',
+                    'numerical_error': numerical_result.get('error'),
+                    'singularities': numerical_result.get('singularities', []),
+                    'steps': symbolic_result.get('steps', []) + numerical_result.get('steps', [])}
             
         except Exception as e:
             return {'success': False, 'error': f'Error general: {str(e)}', 'steps': []}
@@ -289,6 +2268,509 @@ class AdvancedIntegralSolver:
 # Instancia global del solver
 solver = AdvancedIntegralSolver()
 
+# ============================================================
+# Coalescencia de peticiones idénticas (single-flight)
+# ============================================================
+
+class SingleFlight:
+    """Agrupa peticiones idénticas en curso: se calcula una vez y todas comparten el resultado.
+    
+    Los errores que solo afectan a quien lanzó el cálculo (atributo per_client, p. ej. el
+    429 por cliente del control de admisión) no se comparten: quien esperaba lo reintenta.
+    """
+    
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error: Optional[BaseException] = None
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, 'SingleFlight._Call'] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    def do(self, namespace: str, key: str, fn) -> Tuple[Any, bool]:
+        """Ejecuta fn() o espera a la ejecución en curso con la misma clave.
+        
+        Devuelve (resultado, coalesced); coalesced indica que se reutilizó otra ejecución.
+        """
+        full_key = f"{namespace}:{key}"
+        while True:
+            with self._lock:
+                stats = self._stats.setdefault(namespace, {'executed': 0, 'coalesced': 0})
+                call = self._calls.get(full_key)
+                leader = call is None
+                if leader:
+                    call = self._calls[full_key] = SingleFlight._Call()
+                    stats['executed'] += 1
+                else:
+                    stats['coalesced'] += 1
+            
+            if leader:
+                break
+            call.done.wait()
+            if call.error is not None:
+                if getattr(call.error, 'per_client', False):
+                    continue  # el rechazo era del cliente que calculaba, no de este
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[full_key]
+            call.done.set()
+        return call.result, False
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Contadores por endpoint y número de cálculos en curso"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'endpoints': {namespace: dict(stats) for namespace, stats in self._stats.items()}
+            }
+
+single_flight = SingleFlight()
+
+def canonical_request_key(function: str, limits: Dict, coord_system: str,
+                          extra_symbols: Tuple[str, ...] = (), **options) -> str:
+    """Clave canónica de una petición: la expresión parseada y los límites exactos.
+    
+    'x*y' y 'y*x', o 1 y 1.0 como límite, producen la misma clave.
+    """
+    func_expr = solver.parse_function(function, extra_symbols)
+    canonical = {
+        'function': sp.srepr(func_expr),
+        'limits': {coord: [str(solver.exact_limit(value, extra_symbols)) for value in limits[coord]]
+                   for coord in ['x', 'y', 'z']},
+        'coordinate_system': coord_system,
+        'options': options
+    }
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True, default=str).encode()).hexdigest()
+
+def coalesced_response(payload: Dict, coalesced: bool) -> Response:
+    """jsonify que marca con X-Coalesced las respuestas compartidas"""
+    response = jsonify(payload)
+    if coalesced:
+        response.headers['X-Coalesced'] = '1'
+    return response
+
+# ============================================================
+# Estimación de coste y control de admisión
+# ============================================================
+
+ADMISSION_CHEAP_SECONDS = 0.5  # por debajo, la petición va al carril rápido
+ADMISSION_SLOTS = {
+    'cheap': max(2, int(os.environ.get('INTEGRA_CHEAP_SLOTS', 2 * (os.cpu_count() or 1)))),
+    'expensive': max(1, int(os.environ.get('INTEGRA_EXPENSIVE_SLOTS', os.cpu_count() or 1)))
+}
+ADMISSION_QUEUE_LIMIT = {'cheap': 64, 'expensive': 16}
+ADMISSION_MAX_WAIT = {'cheap': 5.0, 'expensive': 15.0}  # segundos en cola antes de responder 503
+ADMISSION_CLIENT_CONCURRENCY = max(1, int(os.environ.get('INTEGRA_CLIENT_CONCURRENCY', 4)))
+# Coste a priori (segundos) por encima del cual la petición se rechaza sin encolarla
+ADMISSION_MAX_COST = float(os.environ.get('INTEGRA_MAX_COST', 300))
+# Direcciones del proxy Node (en la misma máquina) cuyo X-Forwarded-For es de fiar
+TRUSTED_PROXIES = {address.strip() for address in
+                   os.environ.get('INTEGRA_TRUSTED_PROXIES', '127.0.0.1,::1').split(',') if address.strip()}
+
+TRANSCENDENTAL_FUNCTIONS = (sp.sin, sp.cos, sp.tan, sp.cot, sp.sec, sp.csc, sp.asin, sp.acos, sp.atan,
+                            sp.sinh, sp.cosh, sp.tanh, sp.exp, sp.log)
+
+
+class AdmissionRejected(Exception):
+    """Petición rechazada antes de ejecutarse (429 por cliente, 503 por sobrecarga)"""
+    
+    def __init__(self, status: int, message: str, retry_after: int, estimated_cost: float):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.estimated_cost = estimated_cost
+        self.per_client = status == 429  # SingleFlight no lo comparte con otros clientes
+
+
+class CostEstimator:
+    """Estima en segundos el coste de una petición antes de asignarle un worker.
+    
+    Combina un modelo a priori (tamaño de la expresión, clases de funciones, precisión,
+    resolución³ de las gráficas) con la media móvil de los tiempos reales observados
+    para peticiones de la misma firma.
+    """
+    
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._history: Dict[str, float] = {}
+    
+    def features(self, endpoint: str, data: Dict) -> Tuple[str, float]:
+        """Firma (para el histórico) y coste a priori de la petición"""
+        parameter = data.get('parameter')
+        extra_symbols = (parameter,) if isinstance(parameter, str) else ()
+        try:
+            expr = solver.parse_function(data.get('function', ''), extra_symbols)
+        except Exception:
+            return f"{endpoint}:invalid", 0.01  # falla rápido en el parser
+        
+        size = sum(1 for _ in sp.preorder_traversal(expr))
+        classes = []
+        if expr.has(*TRANSCENDENTAL_FUNCTIONS):
+            classes.append('trans')
+        if any(p.is_Pow and not p.exp.is_Integer for p in expr.atoms(sp.Pow)) or expr.has(sp.Abs):
+            classes.append('root')
+        coord_system = data.get('coordinate_system', 'cartesian')
+        size_bucket = min(size // 10, 10)
+        
+        if endpoint.startswith('solve'):
+            cost = 0.05 + 0.02 * size
+            if classes:
+                cost *= 4  # lo más probable es acabar en el método numérico
+            if coord_system != 'cartesian':
+                cost *= 2
+            precision = data.get('precision')
+            if isinstance(precision, int) and precision > 15:
+                cost *= 5 * (precision / 15) ** 2
+            if endpoint == 'solve-sweep':
+                cost *= 2  # integración con el parámetro libre o lote numérico
+            signature = f"{endpoint}:{size_bucket}:{'+'.join(classes)}:{coord_system}:{precision}"
+        else:
+            resolution = data.get('resolution', 30)
+            resolution = resolution if isinstance(resolution, (int, float)) else 30
+            plot_type = data.get('plot_type', 'surface')
+            cost = 0.01 + 2e-7 * resolution ** 3 * (1 + size / 10)
+            if plot_type == 'all':
+                cost *= 2
+            signature = f"{endpoint}:{size_bucket}:{'+'.join(classes)}:{int(resolution) // 10}:{plot_type}"
+        return signature, cost
+    
+    def estimate(self, endpoint: str, data: Dict) -> Tuple[str, float, float]:
+        """(firma, coste estimado, coste a priori); el estimado usa el histórico si lo hay"""
+        signature, prior = self.features(endpoint, data)
+        with self._lock:
+            observed = self._history.get(signature)
+        return signature, observed if observed is not None else prior, prior
+    
+    def record(self, signature: str, elapsed: float) -> None:
+        with self._lock:
+            previous = self._history.get(signature)
+            self._history[signature] = elapsed if previous is None else \
+                (1 - self.alpha) * previous + self.alpha * elapsed
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'signatures': len(self._history)}
+
+
+class AdmissionController:
+    """Limita la concurrencia por cliente y por carril (barato / caro).
+    
+    Cada carril tiene sus propias plazas y su propia cola, de modo que una petición
+    barata nunca espera detrás de una cara. Si la cola está llena o la espera supera
+    el máximo se rechaza de inmediato con 503 y Retry-After; si el cliente ya tiene
+    demasiadas peticiones en curso, con 429. Las que superan ADMISSION_MAX_COST no llegan
+    a ocupar plaza (reject_too_costly).
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._running = {lane: 0 for lane in ADMISSION_SLOTS}
+        self._waiting = {lane: 0 for lane in ADMISSION_SLOTS}
+        self._per_client: Dict[str, int] = {}
+        self._stats = {lane: {'admitted': 0, 'rejected_429': 0, 'rejected_503': 0, 'rejected_cost': 0}
+                       for lane in ADMISSION_SLOTS}
+    
+    def retry_after(self, lane: str, estimated_cost: float) -> int:
+        backlog = (self._waiting[lane] + self._running[lane]) / ADMISSION_SLOTS[lane]
+        return max(1, math.ceil(backlog * max(estimated_cost, 0.1)))
+    
+    def acquire(self, client: str, lane: str, estimated_cost: float) -> None:
+        with self._cond:
+            if self._per_client.get(client, 0) >= ADMISSION_CLIENT_CONCURRENCY:
+                self._stats[lane]['rejected_429'] += 1
+                raise AdmissionRejected(429, 'Demasiadas peticiones simultáneas de este cliente',
+                                        max(1, math.ceil(estimated_cost)), estimated_cost)
+            if self._waiting[lane] >= ADMISSION_QUEUE_LIMIT[lane]:
+                self._stats[lane]['rejected_503'] += 1
+                raise AdmissionRejected(503, 'Servicio saturado, intente más tarde',
+                                        self.retry_after(lane, estimated_cost), estimated_cost)
+            
+            self._per_client[client] = self._per_client.get(client, 0) + 1
+            self._waiting[lane] += 1
+            deadline = time.time() + ADMISSION_MAX_WAIT[lane]
+            try:
+                while self._running[lane] >= ADMISSION_SLOTS[lane]:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self._release_client(client)
+                        self._stats[lane]['rejected_503'] += 1
+                        raise AdmissionRejected(503, 'Tiempo de espera en cola agotado',
+                                                self.retry_after(lane, estimated_cost), estimated_cost)
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting[lane] -= 1
+            self._running[lane] += 1
+            self._stats[lane]['admitted'] += 1
+    
+    def reject_too_costly(self, estimated_cost: float) -> None:
+        """503 inmediato para una petición que ni el carril caro debe ejecutar"""
+        with self._cond:
+            self._stats['expensive']['rejected_cost'] += 1
+        raise AdmissionRejected(503, f'Petición demasiado costosa ({estimated_cost:.0f} s estimados, máximo '
+                                     f'{ADMISSION_MAX_COST:.0f} s): reduzca la resolución, la precisión o la expresión',
+                                max(1, math.ceil(ADMISSION_MAX_COST)), estimated_cost)
+    
+    def release(self, client: str, lane: str) -> None:
+        with self._cond:
+            self._running[lane] -= 1
+            self._release_client(client)
+            self._cond.notify_all()
+    
+    def _release_client(self, client: str) -> None:
+        remaining = self._per_client.get(client, 0) - 1
+        if remaining > 0:
+            self._per_client[client] = remaining
+        else:
+            self._per_client.pop(client, None)
+    
+    def busy(self) -> bool:
+        """Hay peticiones de usuario en curso o en cola"""
+        with self._cond:
+            return any(self._running[lane] or self._waiting[lane] for lane in ADMISSION_SLOTS)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                lane: {
+                    'slots': ADMISSION_SLOTS[lane],
+                    'running': self._running[lane],
+                    'waiting': self._waiting[lane],
+                    **self._stats[lane]
+                } for lane in ADMISSION_SLOTS
+            }
+
+cost_estimator = CostEstimator()
+admission = AdmissionController()
+
+def request_client_id() -> str:
+    """Identificador del cliente; X-Forwarded-For solo se cree si llega del proxy Node.
+    
+    El servicio escucha en 0.0.0.0: de cualquier otra dirección la cabecera se ignora para
+    que no baste con cambiarla para saltarse el límite por cliente.
+    """
+    if request.remote_addr in TRUSTED_PROXIES:
+        forwarded = request.headers.get('X-Forwarded-For', '').split(',')[-1].strip()
+        if forwarded:
+            return forwarded
+    return request.remote_addr or 'anonymous'
+
+def admit(endpoint: str, data: Dict):
+    """Estima el coste y reserva una plaza; devuelve la función que la libera.
+    
+    Lanza AdmissionRejected si la petición no puede aceptarse ahora. El límite de coste se
+    compara con el coste a priori: el histórico de una firma rechazada no se actualizaría.
+    """
+    signature, estimated_cost, prior_cost = cost_estimator.estimate(endpoint, data)
+    if prior_cost > ADMISSION_MAX_COST:
+        admission.reject_too_costly(prior_cost)
+    lane = 'cheap' if estimated_cost <= ADMISSION_CHEAP_SECONDS else 'expensive'
+    client = request_client_id()
+    admission.acquire(client, lane, estimated_cost)
+    start_time = time.time()
+    released = threading.Event()
+    
+    def release():
+        if not released.is_set():
+            released.set()
+            admission.release(client, lane)
+            cost_estimator.record(signature, time.time() - start_time)
+    return release
+
+def run_admitted(endpoint: str, data: Dict, fn):
+    """Ejecuta fn() dentro de una plaza del control de admisión"""
+    release = admit(endpoint, data)
+    try:
+        return fn()
+    finally:
+        release()
+
+def admission_rejected_response(error: AdmissionRejected) -> Tuple[Response, int]:
+    """Respuesta 429/503 con Retry-After"""
+    response = jsonify({
+        'success': False,
+        'error': str(error),
+        'retry_after': error.retry_after,
+        'estimated_cost': error.estimated_cost
+    })
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status
+
+# ============================================================
+# Caché de resultados y verificación en segundo plano
+# ============================================================
+
+RESULT_CACHE_SIZE = int(os.environ.get('INTEGRA_RESULT_CACHE_SIZE', 256))
+VERIFY_QUEUE_SIZE = 100
+VERIFY_QMC_POINTS = 2 ** 12    # por réplica
+VERIFY_QMC_REPLICATES = 8
+VERIFY_SIGMAS = 4.0            # discrepancia admitida en errores típicos del QMC
+VERIFY_RTOL = 1e-3
+VERIFY_ATOL = 1e-9
+VERIFY_MAX_RELATIVE_ERROR = 0.05  # QMC menos preciso que esto: no concluyente
+VERIFY_MAX_DEFER_SECONDS = 30     # espera máxima a que no haya peticiones de usuario
+
+
+class ResultCache:
+    """Caché LRU de respuestas de /solve por clave canónica, con su procedencia.
+    
+    Se guardan y se devuelven copias: el verificador actualiza la procedencia de la
+    entrada sin tocar respuestas que aún se estén serializando.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evicted_suspicious': 0}
+    
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return copy.deepcopy(entry)
+    
+    def put(self, key: str, result: Dict) -> None:
+        with self._lock:
+            self._entries[key] = copy.deepcopy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def set_verification(self, key: str, verification: Dict) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['provenance']['verification'] = verification
+    
+    def evict_suspicious(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._stats['evicted_suspicious'] += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), **self._stats}
+
+
+class ResultVerifier:
+    """Recalcula en segundo plano cada resultado nuevo con un método independiente (QMC).
+    
+    Un único hilo de baja prioridad (nice en Linux) que además espera a que no haya
+    peticiones de usuario en curso, así que no añade latencia. Si el valor QMC no es
+    compatible con el devuelto se marca como discrepante en la caché y en /metrics y la
+    entrada se expulsa para que la siguiente petición lo recalcule.
+    """
+    
+    def __init__(self, cache: ResultCache):
+        self.cache = cache
+        self._queue: 'queue.Queue[Tuple[str, Dict, float]]' = queue.Queue(maxsize=VERIFY_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {'queued': 0, 'agreed': 0, 'disagreed': 0, 'inconclusive': 0,
+                       'skipped': 0, 'failed': 0, 'dropped': 0, 'non_finite_results': 0}
+    
+    def submit(self, key: str, params: Dict, value: float) -> bool:
+        """Encola la verificación; nunca bloquea a la petición"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='integra-verify', daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((key, params, value))
+        except queue.Full:
+            with self._lock:
+                self._stats['dropped'] += 1
+            return False
+        with self._lock:
+            self._stats['queued'] += 1
+        return True
+    
+    def _run(self) -> None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)  # solo este hilo (Linux)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            key, params, value = self._queue.get()
+            deadline = time.time() + VERIFY_MAX_DEFER_SECONDS
+            while admission.busy() and time.time() < deadline:
+                time.sleep(0.2)
+            try:
+                verification = self.verify(params, value)
+            except Exception as e:
+                verification = {'status': 'failed', 'error': str(e)}
+            verification['checked_at'] = time.time()
+            
+            with self._lock:
+                self._stats[verification['status']] += 1
+                if verification.get('non_finite_points'):
+                    self._stats['non_finite_results'] += 1
+            self.cache.set_verification(key, verification)
+            if verification['status'] == 'disagreed':
+                self.cache.evict_suspicious(key)
+                print(f"Verificación discrepante para {params['function']}: "
+                      f"{value} frente a {verification['value']} ± {verification['error_estimate']:.2e}")
+    
+    def verify(self, params: Dict, value: float) -> Dict[str, Any]:
+        limits = params['limits']
+        if any(solver.exact_limit(bound).free_symbols for coord in ['x', 'y', 'z'] for bound in limits[coord]):
+            # El QMC muestrea una caja: con límites que dependen de otras variables no hay con qué comparar
+            return {'status': 'skipped', 'reason': 'límites variables'}
+        func_expr = solver.parse_function(params['function'])
+        estimate = solver.qmc_estimate(func_expr, params['limits'], params['coord_system'],
+                                       VERIFY_QMC_POINTS, VERIFY_QMC_REPLICATES)
+        difference = abs(value - estimate['value'])
+        tolerance = max(VERIFY_SIGMAS * estimate['error_estimate'],
+                        VERIFY_RTOL * abs(estimate['value']), VERIFY_ATOL)
+        
+        if difference <= tolerance:
+            status = 'agreed'
+        elif estimate['error_estimate'] > VERIFY_MAX_RELATIVE_ERROR * max(abs(estimate['value']), VERIFY_ATOL):
+            status = 'inconclusive'  # integrando demasiado irregular para el QMC
+        elif self.is_singular(func_expr, params):
+            # Con singularidades la varianza puede ser infinita y el error típico del QMC
+            # subestima su error real: una discrepancia no basta para declarar el resultado erróneo
+            status = 'inconclusive'
+        else:
+            status = 'disagreed'
+        return {
+            'status': status,
+            'method': f"QMC Sobol aleatorizado ({VERIFY_QMC_REPLICATES}×{VERIFY_QMC_POINTS} puntos)",
+            'value': estimate['value'],
+            'error_estimate': estimate['error_estimate'],
+            'difference': difference,
+            'non_finite_points': estimate['non_finite']
+        }
+    
+    @staticmethod
+    def is_singular(func_expr: sp.Expr, params: Dict) -> bool:
+        transformed_expr, jacobian = solver.coordinate_transform(func_expr, params['coord_system'])
+        return solver.detect_singularities(transformed_expr * jacobian, solver.numeric_limits(params['limits']),
+                                           params['coord_system'])['found']
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'pending': self._queue.qsize(), **self._stats}
+
+result_cache = ResultCache(RESULT_CACHE_SIZE)
+result_verifier = ResultVerifier(result_cache)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Verificar estado del servicio"""
@@ -296,38 +2778,262 @@ def health_check():
         'status': 'OK',
         'service': 'INTEGRA Python Solver',
         'version': '2.0',
-        'capabilities': ['symbolic', 'numerical', 'all_coordinates']
+        'capabilities': ['symbolic', 'numerical', 'high_precision', 'all_coordinates']
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Contadores internos del servicio"""
+    return jsonify({
+        'coalescing': single_flight.snapshot(),
+        'grid_store': grid_store.snapshot(),
+        'incremental_grids': incremental_grids.snapshot(),
+        'compiled_integrands': compiled_integrands.snapshot(),
+        'antiderivatives': antiderivative_memo.snapshot(),
+        'triple_antiderivatives': triple_antiderivatives.snapshot(),
+        'result_cache': result_cache.snapshot(),
+        'verification': result_verifier.snapshot(),
+        'admission': admission.snapshot(),
+        'cost_estimator': cost_estimator.snapshot()
+    })
+
+def parse_solve_request(data: Optional[Dict], extra_symbols: Tuple[str, ...] = ()
+                        ) -> Tuple[Optional[Dict], Optional[Tuple[Response, int]]]:
+    """Valida el cuerpo de /solve; devuelve (parámetros, None) o (None, respuesta de error).
+    
+    Los límites de texto se parsean aquí con el parser propio: lo que sigue recibe solo
+    números o expresiones SymPy, nunca cadenas que sympify pudiera evaluar.
+    """
+    if not data:
+        return None, (jsonify({'success': False, 'error': 'No se recibieron datos'}), 400)
+    
+    # Validar parámetros requeridos
+    required_fields = ['function', 'limits']
+    for field in required_fields:
+        if field not in data:
+            return None, (jsonify({'success': False, 'error': f'Campo requerido: {field}'}), 400)
+    
+    raw_limits = data['limits']
+    if not isinstance(raw_limits, dict):
+        return None, (jsonify({'success': False, 'error': 'Límites inválidos'}), 400)
+    
+    # Validar límites
+    limits = {}
+    for coord in ['x', 'y', 'z']:
+        bounds = raw_limits.get(coord)
+        if not isinstance(bounds, (list, tuple)) or len(bounds) != 2:
+            return None, (jsonify({'success': False, 'error': f'Límites inválidos para {coord}'}), 400)
+        limits[coord] = []
+        for value in bounds:
+            if isinstance(value, str):
+                try:
+                    value = solver.parse_function(value, extra_symbols)
+                except ValueError as e:
+                    return None, (jsonify({'success': False,
+                                           'error': f'Límite inválido para {coord}: {str(e)}'}), 400)
+            elif isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                return None, (jsonify({'success': False, 'error': f'Límites inválidos para {coord}'}), 400)
+            limits[coord].append(value)
+    
+    # Modo de precisión arbitraria (opcional)
+    precision = data.get('precision')
+    quadrature = data.get('quadrature')  # None: automática según singularidades
+    if precision is not None:
+        if not isinstance(precision, int) or isinstance(precision, bool) \
+                or not 1 <= precision <= solver.max_precision_digits:
+            return None, (jsonify({'success': False,
+                                   'error': f'Precisión inválida: entero entre 1 y {solver.max_precision_digits}'}), 400)
+        if quadrature is not None and quadrature not in HP_QUADRATURE_RULES:
+            return None, (jsonify({'success': False, 'error': f'Cuadratura no soportada: {quadrature}'}), 400)
+    
+    numerical_engine = data.get('numerical_engine', 'auto')
+    if numerical_engine not in NUMERICAL_ENGINES:
+        return None, (jsonify({'success': False,
+                               'error': f'Motor numérico no soportado: {numerical_engine}'}), 400)
+    
+    return {
+        'function': data['function'],
+        'limits': limits,
+        'coord_system': data.get('coordinate_system', 'cartesian'),
+        'precision': precision,
+        'quadrature': quadrature,
+        'numerical_engine': numerical_engine
+    }, None
+
 @app.route('/solve', methods=['POST'])
 def solve_integral():
     """Endpoint principal para resolver integrales"""
     try:
         data = request.get_json()
+        params, error_response = parse_solve_request(data)
+        if error_response:
+            return error_response
         
-        if not data:
-            return jsonify({'success': False, 'error': 'No se recibieron datos'}), 400
+        def compute():
+            return run_admitted('solve', data, lambda: solver.solve_triple_integral(
+                params['function'], params['limits'], params['coord_system'],
+                params['precision'], params['quadrature'],
+                numerical_engine=params['numerical_engine']))
+        
+        try:
+            key = canonical_request_key(params['function'], params['limits'], params['coord_system'],
+                                        precision=params['precision'], quadrature=params['quadrature'],
+                                        numerical_engine=params['numerical_engine'])
+        except Exception:
+            # Función no parseable: solve_triple_integral devuelve el error habitual
+            return jsonify(compute())
         
-        # Validar parámetros requeridos
-        required_fields = ['function', 'limits']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'error': f'Campo requerido: {field}'}), 400
+        cached = result_cache.get(key)
+        if cached is not None:
+            cached['provenance']['cached'] = True
+            response = jsonify(cached)
+            response.headers['X-Cache'] = 'hit'
+            return response
         
-        function = data['function']
-        limits = data['limits']
-        coord_system = data.get('coordinate_system', 'cartesian')
+        def solve():
+            result = compute()
+            if result.get('success') and isinstance(result.get('result'), (int, float)):
+                result['provenance'] = {'method': result.get('method'), 'computed_at': time.time(),
+                                        'cached': False, 'verification': {'status': 'pending'}}
+                result_cache.put(key, result)
+                # Tras devolver la respuesta, un hilo de baja prioridad la contrasta
+                result_verifier.submit(key, params, float(result['result']))
+            return result
         
-        # Validar límites
-        for coord in ['x', 'y', 'z']:
-            if coord not in limits or len(limits[coord]) != 2:
-                return jsonify({'success': False, 'error': f'Límites inválidos para {coord}'}), 400
+        # Resolver integral (una sola vez para peticiones idénticas concurrentes)
+        result, coalesced = single_flight.do('solve', key, solve)
+        
+        return coalesced_response(result, coalesced)
+        
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error del servidor: {str(e)}',
+            'traceback': traceback.format_exc()
+        }), 500
+
+def format_stream_event(event: str, payload: Dict, ndjson: bool) -> str:
+    """Serializa un evento como línea NDJSON o como trama Server-Sent Events"""
+    body = json.dumps(payload, default=str, ensure_ascii=False)
+    if ndjson:
+        return json.dumps({'event': event, **payload}, default=str, ensure_ascii=False) + '\n'
+    return f"event: {event}\ndata: {body}\n\n"
+
+@app.route('/solve/stream', methods=['POST'])
+def solve_integral_stream():
+    """Variante de /solve que emite cada paso, resultado parcial y estimación en cuanto se produce.
+    
+    Por defecto responde text/event-stream (SSE); con ?format=ndjson o
+    Accept: application/x-ndjson emite una línea JSON por evento.
+    """
+    data = request.get_json(silent=True)
+    params, error_response = parse_solve_request(data)
+    if error_response:
+        return error_response
+    
+    try:
+        # La plaza se mantiene hasta que termina el cálculo, no solo la respuesta inicial
+        release = admit('solve-stream', data)
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
+    
+    ndjson = (request.args.get('format') == 'ndjson'
+              or 'application/x-ndjson' in request.headers.get('Accept', ''))
+    events = queue.Queue()
+    start_time = time.time()
+    
+    def on_event(event, payload):
+        events.put((event, {**payload, 'elapsed': time.time() - start_time}))
+    
+    def run():
+        try:
+            result = solver.solve_triple_integral(params['function'], params['limits'], params['coord_system'],
+                                                  params['precision'], params['quadrature'], on_event,
+                                                  params['numerical_engine'])
+            on_event('result', result)
+        except Exception as e:
+            on_event('error', {'success': False, 'error': f'Error del servidor: {str(e)}'})
+        finally:
+            release()
+            events.put(None)
+    
+    threading.Thread(target=run, daemon=True).start()
+    
+    def generate():
+        while True:
+            try:
+                item = events.get(timeout=STREAM_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                # Mantiene viva la conexión a través de proxies mientras se calcula
+                yield format_stream_event('heartbeat', {'elapsed': time.time() - start_time}, ndjson) \
+                    if ndjson else ': keep-alive\n\n'
+                continue
+            if item is None:
+                break
+            yield format_stream_event(*item, ndjson)
+    
+    return Response(generate(),
+                    mimetype='application/x-ndjson' if ndjson else 'text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def parse_sweep_values(raw: Any) -> Tuple[Optional[List[float]], Optional[str]]:
+    """Lista de valores o rango {start, stop, num} (extremos incluidos); devuelve (valores, error)"""
+    if isinstance(raw, dict):
+        try:
+            start, stop, num = float(raw['start']), float(raw['stop']), int(raw.get('num', 50))
+        except (KeyError, TypeError, ValueError):
+            return None, 'Rango inválido: se esperaba {start, stop, num}'
+        if not 2 <= num <= SWEEP_MAX_VALUES:
+            return None, f'num debe estar entre 2 y {SWEEP_MAX_VALUES}'
+        values = np.linspace(start, stop, num).tolist()
+    elif isinstance(raw, list):
+        if not 1 <= len(raw) <= SWEEP_MAX_VALUES:
+            return None, f'Se admiten entre 1 y {SWEEP_MAX_VALUES} valores'
+        if any(isinstance(value, bool) or not isinstance(value, (int, float)) for value in raw):
+            return None, 'Los valores deben ser numéricos'
+        values = [float(value) for value in raw]
+    else:
+        return None, 'Campo requerido: values (lista o {start, stop, num})'
+    if not all(math.isfinite(value) for value in values):
+        return None, 'Los valores deben ser finitos'
+    return values, None
+
+@app.route('/solve/sweep', methods=['POST'])
+def solve_integral_sweep():
+    """Resuelve la integral para una familia de valores de un parámetro (p. ej. el radio a en [0, 5])"""
+    try:
+        data = request.get_json(silent=True)
+        parameter = data.get('parameter') if isinstance(data, dict) else None
+        valid_parameter = isinstance(parameter, str) and re.fullmatch(r'[A-Za-z]', parameter) \
+            and parameter not in PARSER_SYMBOLS and parameter not in PARSER_CONSTANTS
+        params, error_response = parse_solve_request(data, (parameter,) if valid_parameter else ())
+        if error_response:
+            return error_response
         
-        # Resolver integral
-        result = solver.solve_triple_integral(function, limits, coord_system)
+        if not valid_parameter:
+            return jsonify({'success': False,
+                            'error': 'Parámetro inválido: una letra que no sea variable ni constante'}), 400
+        values, values_error = parse_sweep_values(data.get('values'))
+        if values_error:
+            return jsonify({'success': False, 'error': values_error}), 400
         
-        return jsonify(result)
+        def sweep():
+            return run_admitted('solve-sweep', data, lambda: solver.solve_sweep(
+                params['function'], params['limits'], params['coord_system'], parameter, values))
         
+        try:
+            key = canonical_request_key(params['function'], params['limits'], params['coord_system'],
+                                        extra_symbols=(parameter,), parameter=parameter, values=values)
+        except Exception:
+            return jsonify(sweep())
+        
+        result, coalesced = single_flight.do('solve-sweep', key, sweep)
+        return coalesced_response(result, coalesced)
+        
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -351,8 +3057,10 @@ def validate_function():
                 'valid': True,
                 'parsed': str(expr),
                 'latex': latex(expr),
-                'variables': [str(var) for var in expr.free_symbols]
+                'variables': sorted(str(var) for var in expr.free_symbols)
             })
+        except ExpressionError as e:
+            return jsonify({'valid': False, 'error': str(e), 'position': e.position})
         except Exception as e:
             return jsonify({'valid': False, 'error': str(e)})
             
@@ -373,32 +3081,41 @@ def generate_plot_data():
         coord_system = data.get('coordinate_system', 'cartesian')
         resolution = data.get('resolution', 30)
         
-        # Parsear función
-        func_expr = solver.parse_function(function)
-        
-        # Transformar coordenadas
-        transformed_expr, jacobian = solver.coordinate_transform(func_expr, coord_system)
+        def build():
+            # Parsear función
+            func_expr = solver.parse_function(function)
+            
+            # Transformar coordenadas
+            transformed_expr, jacobian = solver.coordinate_transform(func_expr, coord_system)
+            
+            # Generar datos para visualización
+            plot_data = generate_visualization_data(
+                transformed_expr, 
+                limits, 
+                coord_system, 
+                resolution
+            )
+            
+            return {
+                'success': True,
+                'plot_data': plot_data,
+                'function_info': {
+                    'original': str(func_expr),
+                    'transformed': str(transformed_expr),
+                    'jacobian': str(jacobian),
+                    'latex': latex(func_expr),
+                    'coordinate_system': coord_system
+                }
+            }
         
-        # Generar datos para visualización
-        plot_data = generate_visualization_data(
-            transformed_expr, 
-            limits, 
-            coord_system, 
-            resolution
-        )
+        key = canonical_request_key(function, limits, coord_system, resolution=resolution)
+        payload, coalesced = single_flight.do('generate-plot-data', key,
+                                              lambda: run_admitted('generate-plot-data', data, build))
         
-        return jsonify({
-            'success': True,
-            'plot_data': plot_data,
-            'function_info': {
-                'original': str(func_expr),
-                'transformed': str(transformed_expr),
-                'jacobian': str(jacobian),
-                'latex': latex(func_expr),
-                'coordinate_system': coord_system
-            }
-        })
+        return coalesced_response(payload, coalesced)
         
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -411,63 +3128,43 @@ def generate_visualization_data(func_expr, limits, coord_system, resolution):
     try:
         # Crear función lambda para evaluación rápida
         if coord_system == 'cartesian':
-            func_lambda = sp.lambdify((x, y, z), func_expr, 'numpy')
+            func_lambda = compiled_integrands.lambdify((x, y, z), func_expr)
             var_names = ['x', 'y', 'z']
         elif coord_system == 'cylindrical':
-            func_lambda = sp.lambdify((r, theta, z), func_expr, 'numpy')
+            func_lambda = compiled_integrands.lambdify((r, theta, z), func_expr)
             var_names = ['r', 'theta', 'z']
         else:  # spherical
-            func_lambda = sp.lambdify((rho, theta, phi), func_expr, 'numpy')
+            func_lambda = compiled_integrands.lambdify((rho, theta, phi), func_expr)
             var_names = ['rho', 'theta', 'phi']
         
-        # Generar malla de puntos
-        x_vals = np.linspace(limits['x'][0], limits['x'][1], resolution)
-        y_vals = np.linspace(limits['y'][0], limits['y'][1], resolution)
-        z_vals = np.linspace(limits['z'][0], limits['z'][1], resolution)
-        
         # Datos para superficie de la función
         surface_data = []
         
-        # Generar planos de corte en diferentes valores de Z
+        # Generar planos de corte en diferentes valores de Z (rejillas compartidas entre procesos)
         num_planes = min(8, resolution // 4)
         z_planes = np.linspace(limits['z'][0], limits['z'][1], num_planes)
+        grids = evaluate_level_grids(func_lambda, limits, resolution, z_planes,
+                                     (sp.srepr(func_expr), coord_system))
         
-        for z_val in z_planes:
-            X, Y = np.meshgrid(x_vals, y_vals)
-            Z = np.full_like(X, z_val)
-            
-            # Evaluar función
-            try:
-                if coord_system == 'cartesian':
-                    F = func_lambda(X, Y, Z)
-                elif coord_system == 'cylindrical':
-                    # Convertir a cilíndricas: r, theta, z
-                    R = X  # r está en x
-                    THETA = Y  # theta está en y
-                    F = func_lambda(R, THETA, Z)
-                else:  # spherical
-                    # Convertir a esféricas: rho, theta, phi
-                    RHO = X  # rho está en x
-                    THETA = Y  # theta está en y
-                    PHI = Z  # phi está en z
-                    F = func_lambda(RHO, THETA, PHI)
-                
-                # Filtrar valores finitos
-                mask = np.isfinite(F)
-                
-                surface_data.append({
-                    'type': 'surface_slice',
-                    'z_level': float(z_val),
-                    'x': X[mask].flatten().tolist(),
-                    'y': Y[mask].flatten().tolist(),
-                    'z': Z[mask].flatten().tolist(),
-                    'values': F[mask].flatten().tolist(),
-                    'coordinate_system': coord_system
-                })
-                
-            except Exception as e:
-                print(f"Error evaluando plano z={z_val}: {e}")
+        for grid in grids:
+            # X, Y, Z son (x, y, z), (r, θ, z) o (ρ, θ, φ) según el sistema
+            X, Y, Z, F = grid['A'], grid['B'], grid['C'], grid['F']
+            if F is None:
+                print(f"Error evaluando plano z={grid['level']}")
                 continue
+            
+            # Filtrar valores finitos
+            mask = np.isfinite(F)
+            
+            surface_data.append({
+                'type': 'surface_slice',
+                'z_level': grid['level'],
+                'x': X[mask].tolist(),
+                'y': Y[mask].tolist(),
+                'z': Z[mask].tolist(),
+                'values': F[mask].tolist(),
+                'coordinate_system': coord_system
+            })
         
         # Generar puntos de muestra aleatorios
         num_samples = min(500, resolution * 5)
@@ -571,34 +3268,45 @@ def generate_plotly_3d():
         resolution = data.get('resolution', 30)
         plot_type = data.get('plot_type', 'surface')  # surface, scatter, mesh
         
-        # Parsear función
-        func_expr = solver.parse_function(function)
-        
-        # Transformar coordenadas
-        transformed_expr, jacobian = solver.coordinate_transform(func_expr, coord_system)
+        def build():
+            # Parsear función
+            func_expr = solver.parse_function(function)
+            
+            # Transformar coordenadas
+            transformed_expr, jacobian = solver.coordinate_transform(func_expr, coord_system)
+            
+            # Generar gráfica 3D con Plotly
+            plotly_data = create_plotly_3d_visualization(
+                transformed_expr, 
+                limits, 
+                coord_system, 
+                resolution,
+                plot_type,
+                function
+            )
+            
+            return {
+                'success': True,
+                'plotly_data': plotly_data,
+                'function_info': {
+                    'original': str(func_expr),
+                    'transformed': str(transformed_expr),
+                    'jacobian': str(jacobian),
+                    'latex': latex(func_expr),
+                    'coordinate_system': coord_system
+                }
+            }
         
-        # Generar gráfica 3D con Plotly
-        plotly_data = create_plotly_3d_visualization(
-            transformed_expr, 
-            limits, 
-            coord_system, 
-            resolution,
-            plot_type,
-            function
-        )
+        # El título de la gráfica usa el texto original, así que forma parte de la clave
+        key = canonical_request_key(function, limits, coord_system, resolution=resolution,
+                                    plot_type=plot_type, title=function)
+        payload, coalesced = single_flight.do('generate-plotly-3d', key,
+                                              lambda: run_admitted('generate-plotly-3d', data, build))
         
-        return jsonify({
-            'success': True,
-            'plotly_data': plotly_data,
-            'function_info': {
-                'original': str(func_expr),
-                'transformed': str(transformed_expr),
-                'jacobian': str(jacobian),
-                'latex': latex(func_expr),
-                'coordinate_system': coord_system
-            }
-        })
+        return coalesced_response(payload, coalesced)
         
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -607,38 +3315,71 @@ def generate_plotly_3d():
         }), 500
 
 def create_plotly_3d_visualization(func_expr, limits, coord_system, resolution, plot_type, original_function):
-    """Crear visualización 3D completa con Plotly"""
+    """Crear visualización 3D completa con Plotly.
+    
+    Las rejillas evaluadas se calculan una vez (niveles en paralelo) y se comparten entre
+    la superficie y los planos de corte; después cada traza se construye como una tarea
+    independiente del pool de hilos. metadata['timings'] recoge el tiempo de cada una.
+    """
     try:
+        timings = {}
+        
         # Crear función lambda para evaluación
         if coord_system == 'cartesian':
-            func_lambda = sp.lambdify((x, y, z), func_expr, 'numpy')
+            func_lambda = compiled_integrands.lambdify((x, y, z), func_expr)
         elif coord_system == 'cylindrical':
-            func_lambda = sp.lambdify((r, theta, z), func_expr, 'numpy')
+            func_lambda = compiled_integrands.lambdify((r, theta, z), func_expr)
         else:  # spherical
-            func_lambda = sp.lambdify((rho, theta, phi), func_expr, 'numpy')
+            func_lambda = compiled_integrands.lambdify((rho, theta, phi), func_expr)
         
-        # Generar datos para la gráfica
-        traces = []
+        need_surface = plot_type in ['surface', 'all']
+        need_slices = plot_type in ['slices', 'all'] and coord_system == 'cartesian'
+        grid_key = (sp.srepr(func_expr), coord_system)
         
-        # 1. Superficie de la función (si es posible)
-        if plot_type in ['surface', 'all']:
-            surface_traces = create_function_surface(func_lambda, limits, coord_system, resolution)
-            traces.extend(surface_traces)
+        # Rejillas compartidas: los 3 cortes coinciden con los niveles pares de la superficie
+        start_time = time.time()
+        surface_grids, slice_grids = None, None
+        if need_surface:
+            surface_levels = np.linspace(limits['z'][0], limits['z'][1], SURFACE_LEVELS)
+            surface_grids = evaluate_level_grids(func_lambda, limits, resolution, surface_levels, grid_key)
+            if need_slices:
+                slice_grids = [subsample_level_grid(grid, 2) for grid in surface_grids[::2]]
+        elif need_slices:
+            slice_levels = np.linspace(limits['z'][0], limits['z'][1], SLICE_LEVELS)
+            slice_grids = evaluate_level_grids(func_lambda, limits, resolution // 2, slice_levels, grid_key)
+        timings['grids'] = time.time() - start_time
         
-        # 2. Región de integración (wireframe)
+        # Cada tipo de traza es una tarea independiente
+        tasks = {}
+        if need_surface:
+            tasks['surface'] = lambda: create_function_surface(func_lambda, limits, coord_system, resolution,
+                                                               surface_grids)
         if plot_type in ['wireframe', 'all']:
-            wireframe_trace = create_integration_region_plotly(limits, coord_system)
-            traces.append(wireframe_trace)
-        
-        # 3. Puntos de muestra con colores
+            tasks['wireframe'] = lambda: create_integration_region_plotly(limits, coord_system)
         if plot_type in ['scatter', 'all']:
-            scatter_trace = create_sample_points_plotly(func_lambda, limits, coord_system, resolution)
-            traces.append(scatter_trace)
+            tasks['scatter'] = lambda: create_sample_points_plotly(func_lambda, limits, coord_system, resolution)
+        if need_slices:
+            tasks['slices'] = lambda: create_function_slices_plotly(func_lambda, limits, coord_system, resolution,
+                                                                   slice_grids)
+        
+        def timed(name, task):
+            task_start = time.time()
+            result = task()
+            return result, time.time() - task_start
+        
+        futures = {name: get_plot_executor().submit(timed, name, task) for name, task in tasks.items()}
         
-        # 4. Planos de corte
-        if plot_type in ['slices', 'all']:
-            slice_traces = create_function_slices_plotly(func_lambda, limits, coord_system, resolution)
-            traces.extend(slice_traces)
+        # Generar datos para la gráfica (orden fijo: superficie, región, puntos, cortes)
+        traces = []
+        for name in ['surface', 'wireframe', 'scatter', 'slices']:
+            if name not in futures:
+                continue
+            result, elapsed = futures[name].result()
+            timings[name] = elapsed
+            if isinstance(result, list):
+                traces.extend(result)
+            else:
+                traces.append(result)
         
         # Configurar layout
         layout = create_plotly_layout(limits, coord_system, original_function)
@@ -666,124 +3407,130 @@ def create_plotly_3d_visualization(func_expr, limits, coord_system, resolution,
                 'coordinate_system': coord_system,
                 'resolution': resolution,
                 'plot_type': plot_type,
-                'num_traces': len([t for t in traces if t is not None])
+                'num_traces': len([t for t in traces if t is not None]),
+                'timings': timings
             }
         }
         
     except Exception as e:
         raise Exception(f"Error en create_plotly_3d_visualization: {str(e)}")
 
-def create_function_surface(func_lambda, limits, coord_system, resolution):
+def get_plot_executor() -> ThreadPoolExecutor:
+    """Pool de hilos compartido para evaluar rejillas y construir trazas (NumPy libera el GIL)"""
+    global _plot_executor
+    with _plot_executor_lock:
+        if _plot_executor is None:
+            _plot_executor = ThreadPoolExecutor(max_workers=PLOT_WORKERS, thread_name_prefix='plotly')
+        return _plot_executor
+
+def evaluate_level_grids(func_lambda, limits, resolution, levels, cache_key=None):
+    """Evalúa la función en una rejilla (resolution x resolution) para cada nivel del tercer eje.
+    
+    Los ejes siguen el orden de los límites: (x, y) son (x, y), (r, θ) o (ρ, θ) y el
+    nivel es z o φ. Los niveles se evalúan en paralelo; un nivel que falla queda con F = None.
+    A, B y C son vistas por broadcasting (no ocupan memoria). Con cache_key (la expresión
+    canónica) cada F se comparte entre procesos a través de grid_store y, si falta, se
+    completa a partir de la rejilla anterior del mismo integrando y nivel (incremental_grids)
+    evaluando solo los nodos que no coinciden con ella.
+    """
+    a_vals = np.linspace(limits['x'][0], limits['x'][1], resolution)
+    b_vals = np.linspace(limits['y'][0], limits['y'][1], resolution)
+    a_sparse, b_sparse = np.meshgrid(a_vals, b_vals, sparse=True)
+    shape = (len(b_vals), len(a_vals))
+    A, B = np.broadcast_to(a_sparse, shape), np.broadcast_to(b_sparse, shape)
+    
+    def evaluate(level):
+        def compute():
+            try:
+                if cache_key is not None:
+                    return incremental_grids.evaluate((cache_key, float(level)), func_lambda, level, a_vals, b_vals)
+                with np.errstate(all='ignore'):
+                    values = np.real(np.asarray(func_lambda(a_sparse, b_sparse, level)))
+                return np.array(np.broadcast_to(values, shape), dtype=float)
+            except Exception:
+                return None
+        
+        if cache_key is None:
+            F = compute()
+        else:
+            key = grid_store.make_key(cache_key, list(limits['x']), list(limits['y']), resolution, float(level))
+            F = grid_store.get_or_compute(key, compute)
+        return {'level': float(level), 'A': A, 'B': B, 'C': np.broadcast_to(float(level), shape), 'F': F}
+    
+    return list(get_plot_executor().map(evaluate, levels))
+
+def subsample_level_grid(grid, step):
+    """Rejilla compartida tomando uno de cada `step` puntos por eje"""
+    return {key: value[::step, ::step] if isinstance(value, np.ndarray) else value
+            for key, value in grid.items()}
+
+def to_plotly_list(values):
+    """Array NumPy a lista JSON; los valores no finitos pasan a None (null)"""
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isfinite(values), values, None).tolist()
+
+def create_function_surface(func_lambda, limits, coord_system, resolution, grids=None):
     """Crear superficie 3D de la función"""
     traces = []
     
     try:
-        # Generar malla de puntos
-        if coord_system == 'cartesian':
-            x_vals = np.linspace(limits['x'][0], limits['x'][1], resolution)
-            y_vals = np.linspace(limits['y'][0], limits['y'][1], resolution)
-            X, Y = np.meshgrid(x_vals, y_vals)
-            
-            # Crear superficies en diferentes valores de Z
-            z_levels = np.linspace(limits['z'][0], limits['z'][1], 5)
-            
-            for i, z_val in enumerate(z_levels):
-                Z = np.full_like(X, z_val)
-                try:
-                    F = func_lambda(X, Y, Z)
-                    # Filtrar valores finitos
-                    mask = np.isfinite(F)
-                    
-                    if np.any(mask):
-                        trace = {
-                            'type': 'surface',
-                            'x': X,
-                            'y': Y, 
-                            'z': Z,
-                            'surfacecolor': F,
-                            'colorscale': 'Viridis',
-                            'opacity': 0.7,
-                            'name': f'f(x,y,{z_val:.2f})',
-                            'showscale': i == 0,
-                            'colorbar': {
-                                'title': 'f(x,y,z)',
-                                'titleside': 'right'
-                            } if i == 0 else None
-                        }
-                        traces.append(trace)
-                except Exception:
-                    continue
-                    
-        elif coord_system == 'cylindrical':
-            # Para cilíndricas: r, theta, z
-            r_vals = np.linspace(limits['x'][0], limits['x'][1], resolution)
-            theta_vals = np.linspace(limits['y'][0], limits['y'][1], resolution)
-            R, THETA = np.meshgrid(r_vals, theta_vals)
-            
-            z_levels = np.linspace(limits['z'][0], limits['z'][1], 5)
-            
-            for i, z_val in enumerate(z_levels):
-                Z = np.full_like(R, z_val)
-                try:
-                    F = func_lambda(R, THETA, Z)
-                    
-                    # Convertir a coordenadas cartesianas para visualización
-                    X = R * np.cos(THETA)
-                    Y = R * np.sin(THETA)
-                    
-                    mask = np.isfinite(F)
-                    
-                    if np.any(mask):
-                        trace = {
-                            'type': 'surface',
-                            'x': X,
-                            'y': Y,
-                            'z': Z,
-                            'surfacecolor': F,
-                            'colorscale': 'Plasma',
-                            'opacity': 0.7,
-                            'name': f'f(r,θ,{z_val:.2f})',
-                            'showscale': i == 0
-                        }
-                        traces.append(trace)
-                except Exception:
-                    continue
-                    
-        else:  # spherical
-            # Para esféricas: rho, theta, phi
-            rho_vals = np.linspace(limits['x'][0], limits['x'][1], resolution)
-            theta_vals = np.linspace(limits['y'][0], limits['y'][1], resolution)
-            RHO, THETA = np.meshgrid(rho_vals, theta_vals)
+        if grids is None:
+            levels = np.linspace(limits['z'][0], limits['z'][1], SURFACE_LEVELS)
+            grids = evaluate_level_grids(func_lambda, limits, resolution, levels)
+        
+        for i, grid in enumerate(grids):
+            F = grid['F']
+            if F is None or not np.any(np.isfinite(F)):
+                continue
+            level = grid['level']
             
-            phi_levels = np.linspace(limits['z'][0], limits['z'][1], 5)
+            if coord_system == 'cartesian':
+                X, Y, Z = grid['A'], grid['B'], grid['C']
+                trace = {
+                    'type': 'surface',
+                    'colorscale': 'Viridis',
+                    'name': f'f(x,y,{level:.2f})',
+                    'showscale': i == 0,
+                    'colorbar': {
+                        'title': 'f(x,y,z)',
+                        'titleside': 'right'
+                    } if i == 0 else None
+                }
+                
+            elif coord_system == 'cylindrical':
+                # Para cilíndricas: r, theta, z -> cartesianas para visualización
+                R, THETA = grid['A'], grid['B']
+                X = R * np.cos(THETA)
+                Y = R * np.sin(THETA)
+                Z = grid['C']
+                trace = {
+                    'type': 'surface',
+                    'colorscale': 'Plasma',
+                    'name': f'f(r,θ,{level:.2f})',
+                    'showscale': i == 0
+                }
+                
+            else:  # spherical
+                # Para esféricas: rho, theta, phi -> cartesianas
+                RHO, THETA, PHI = grid['A'], grid['B'], grid['C']
+                X = RHO * np.sin(PHI) * np.cos(THETA)
+                Y = RHO * np.sin(PHI) * np.sin(THETA)
+                Z = RHO * np.cos(PHI)
+                trace = {
+                    'type': 'surface',
+                    'colorscale': 'Cividis',
+                    'name': f'f(ρ,θ,{level:.2f})',
+                    'showscale': i == 0
+                }
             
-            for i, phi_val in enumerate(phi_levels):
-                PHI = np.full_like(RHO, phi_val)
-                try:
-                    F = func_lambda(RHO, THETA, PHI)
-                    
-                    # Convertir a coordenadas cartesianas
-                    X = RHO * np.sin(PHI) * np.cos(THETA)
-                    Y = RHO * np.sin(PHI) * np.sin(THETA)
-                    Z = RHO * np.cos(PHI)
-                    
-                    mask = np.isfinite(F)
-                    
-                    if np.any(mask):
-                        trace = {
-                            'type': 'surface',
-                            'x': X,
-                            'y': Y,
-                            'z': Z,
-                            'surfacecolor': F,
-                            'colorscale': 'Cividis',
-                            'opacity': 0.7,
-                            'name': f'f(ρ,θ,{phi_val:.2f})',
-                            'showscale': i == 0
-                        }
-                        traces.append(trace)
-                except Exception:
-                    continue
+            trace.update({
+                'x': to_plotly_list(X),
+                'y': to_plotly_list(Y),
+                'z': to_plotly_list(Z),
+                'surfacecolor': to_plotly_list(F),
+                'opacity': 0.7
+            })
+            traces.append(trace)
                     
     except Exception as e:
         print(f"Error creando superficie: {e}")
@@ -817,9 +3564,9 @@ def create_integration_region_plotly(limits, coord_system):
         
         for edge in edges:
             start, end = vertices[edge[0]], vertices[edge[1]]
-            x_lines.extend([start[0], end[0], None])
-            y_lines.extend([start[1], end[1], None])
-            z_lines.extend([start[2], end[2], None])
+            x_lines.extend([float(start[0]), float(end[0]), None])
+            y_lines.extend([float(start[1]), float(end[1]), None])
+            z_lines.extend([float(start[2]), float(end[2]), None])
         
         return {
             'type': 'scatter3d',
@@ -851,14 +3598,14 @@ def create_sample_points_plotly(func_lambda, limits, coord_system, resolution):
             y_samples = np.random.uniform(limits['y'][0], limits['y'][1], num_samples)
             z_samples = np.random.uniform(limits['z'][0], limits['z'][1], num_samples)
             
-            f_values = func_lambda(x_samples, y_samples, z_samples)
+            f_values = func_lambda(x_samples, y_samples, z_samples) * np.ones(num_samples)
             
         elif coord_system == 'cylindrical':
             r_samples = np.random.uniform(limits['x'][0], limits['x'][1], num_samples)
             theta_samples = np.random.uniform(limits['y'][0], limits['y'][1], num_samples)
             z_samples = np.random.uniform(limits['z'][0], limits['z'][1], num_samples)
             
-            f_values = func_lambda(r_samples, theta_samples, z_samples)
+            f_values = func_lambda(r_samples, theta_samples, z_samples) * np.ones(num_samples)
             
             # Convertir a cartesianas para visualización
             x_samples = r_samples * np.cos(theta_samples)
@@ -869,7 +3616,7 @@ def create_sample_points_plotly(func_lambda, limits, coord_system, resolution):
             theta_samples = np.random.uniform(limits['y'][0], limits['y'][1], num_samples)
             phi_samples = np.random.uniform(limits['z'][0], limits['z'][1], num_samples)
             
-            f_values = func_lambda(rho_samples, theta_samples, phi_samples)
+            f_values = func_lambda(rho_samples, theta_samples, phi_samples) * np.ones(num_samples)
             
             # Convertir a cartesianas
             x_samples = rho_samples * np.sin(phi_samples) * np.cos(theta_samples)
@@ -885,12 +3632,12 @@ def create_sample_points_plotly(func_lambda, limits, coord_system, resolution):
         return {
             'type': 'scatter3d',
             'mode': 'markers',
-            'x': x_samples[mask],
-            'y': y_samples[mask],
-            'z': z_samples[mask],
+            'x': x_samples[mask].tolist(),
+            'y': y_samples[mask].tolist(),
+            'z': z_samples[mask].tolist(),
             'marker': {
                 'size': 4,
-                'color': f_values[mask],
+                'color': np.real(f_values[mask]).tolist(),
                 'colorscale': 'RdYlBu',
                 'opacity': 0.8,
                 'colorbar': {
@@ -912,43 +3659,45 @@ def create_sample_points_plotly(func_lambda, limits, coord_system, resolution):
         print(f"Error creando puntos de muestra: {e}")
         return None
 
-def create_function_slices_plotly(func_lambda, limits, coord_system, resolution):
+def create_function_slices_plotly(func_lambda, limits, coord_system, resolution, grids=None):
     """Crear planos de corte de la función"""
     traces = []
     
     try:
-        # Crear planos de corte en Z
-        z_levels = np.linspace(limits['z'][0], limits['z'][1], 3)
+        if coord_system != 'cartesian':
+            return traces
         
-        for z_val in z_levels:
-            if coord_system == 'cartesian':
-                x_vals = np.linspace(limits['x'][0], limits['x'][1], resolution//2)
-                y_vals = np.linspace(limits['y'][0], limits['y'][1], resolution//2)
-                X, Y = np.meshgrid(x_vals, y_vals)
-                Z = np.full_like(X, z_val)
-                
-                F = func_lambda(X, Y, Z)
-                mask = np.isfinite(F)
-                
-                if np.any(mask):
-                    trace = {
-                        'type': 'scatter3d',
-                        'mode': 'markers',
-                        'x': X[mask].flatten(),
-                        'y': Y[mask].flatten(),
-                        'z': Z[mask].flatten(),
-                        'marker': {
-                            'size': 3,
-                            'color': F[mask].flatten(),
-                            'colorscale': 'Turbo',
-                            'opacity': 0.6,
-                            'showscale': False
-                        },
-                        'name': f'Corte z={z_val:.2f}',
-                        'showlegend': False,
-                        'hoverinfo': 'skip'
-                    }
-                    traces.append(trace)
+        # Crear planos de corte en Z (o reutilizar las rejillas ya evaluadas)
+        if grids is None:
+            levels = np.linspace(limits['z'][0], limits['z'][1], SLICE_LEVELS)
+            grids = evaluate_level_grids(func_lambda, limits, resolution // 2, levels)
+        
+        for grid in grids:
+            F = grid['F']
+            if F is None:
+                continue
+            X, Y, Z = grid['A'], grid['B'], grid['C']
+            mask = np.isfinite(F)
+            
+            if np.any(mask):
+                trace = {
+                    'type': 'scatter3d',
+                    'mode': 'markers',
+                    'x': X[mask].tolist(),
+                    'y': Y[mask].tolist(),
+                    'z': Z[mask].tolist(),
+                    'marker': {
+                        'size': 3,
+                        'color': F[mask].tolist(),
+                        'colorscale': 'Turbo',
+                        'opacity': 0.6,
+                        'showscale': False
+                    },
+                    'name': f"Corte z={grid['level']:.2f}",
+                    'showlegend': False,
+                    'hoverinfo': 'skip'
+                }
+                traces.append(trace)
                     
     except Exception as e:
         print(f"Error creando planos de corte: {e}")
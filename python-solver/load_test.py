@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+INTEGRA - Generador de carga para el microservicio Python
+Reproduce una mezcla de tráfico realista (/solve, /validate, /generate-plot-data,
+/generate-plotly-3d) construida a partir de los casos de ejemplo del repositorio y mide
+rendimiento, latencias, errores y consumo de CPU/memoria del servidor.
+
+Uso típico:
+    python load_test.py --rps 5,10,20 --duration 30          # arranca app.py y sube la carga por etapas
+    python load_test.py --url http://localhost:5002 --rps 10  # contra una instancia ya iniciada
+    python load_test.py --serve-cmd "gunicorn -w 4 -b 127.0.0.1:5002 app:app" --rps 10,20,40
+
+Solo usa la biblioteca estándar; si psutil está instalado se usa para medir los procesos
+del servidor, si no se leen /proc (Linux).
+"""
+
+import argparse
+import ast
+import json
+import math
+import operator
+import os
+import random
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import psutil  # opcional
+except ImportError:
+    psutil = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CASE_FILES = [os.path.join(HERE, '..', 'src', 'data', 'testCases.ts'),
+              os.path.join(HERE, '..', 'src', 'data', 'engineeringCases.ts')]
+DEFAULT_URL = 'http://127.0.0.1:5002'
+DEFAULT_MIX = 'solve=0.5,validate=0.2,plot-data=0.15,plotly-3d=0.15'
+ENDPOINTS = {
+    'solve': '/solve',
+    'validate': '/validate',
+    'plot-data': '/generate-plot-data',
+    'plotly-3d': '/generate-plotly-3d'
+}
+SATURATION_P95_FACTOR = 3.0   # p95 que se multiplica por esto respecto a la primera etapa
+SATURATION_ERROR_RATE = 0.01
+
+# ============================================================
+# Casos de ejemplo
+# ============================================================
+
+_CASE_RE = re.compile(
+    r"function:\s*'(?P<function>[^']+)'\s*,\s*"
+    r"limits:\s*\{(?P<limits>[^}]*)\}\s*,\s*"
+    r"coordinateSystem:\s*'(?P<coord>\w+)'", re.S)
+_LIMIT_RE = re.compile(r"(?P<axis>[xyz])\s*:\s*\[\s*(?P<lower>[^,\]]+)\s*,\s*(?P<upper>[^\]]+?)\s*\]")
+
+_ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+               ast.Div: operator.truediv, ast.Pow: operator.pow, ast.USub: operator.neg}
+
+
+def limit_value(text: str) -> float:
+    """Evalúa un límite sencillo ('2*3.14159', 'pi/2') sin eval"""
+    def evaluate(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in ('pi', 'e'):
+            return getattr(math, node.id)
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            return _ARITHMETIC[type(node.op)](evaluate(node.left), evaluate(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _ARITHMETIC:
+            return _ARITHMETIC[type(node.op)](evaluate(node.operand))
+        raise ValueError(f"Límite no soportado: {text}")
+    return float(evaluate(ast.parse(text.replace('^', '**'), mode='eval').body))
+
+
+def load_cases(paths: List[str]) -> List[Dict[str, Any]]:
+    """Extrae función, límites y sistema de coordenadas de los ficheros .ts de casos"""
+    cases = []
+    for path in paths:
+        try:
+            with open(path, encoding='utf-8') as handle:
+                source = handle.read()
+        except OSError:
+            continue
+        for match in _CASE_RE.finditer(source):
+            limits = {}
+            for limit in _LIMIT_RE.finditer(match.group('limits')):
+                try:
+                    bounds = [limit_value(limit.group(key).strip().strip('\'"')) for key in ('lower', 'upper')]
+                except (ValueError, SyntaxError):
+                    break
+                limits[limit.group('axis')] = bounds
+            if len(limits) == 3:
+                cases.append({'function': match.group('function'), 'limits': limits,
+                              'coordinate_system': match.group('coord')})
+    return cases
+
+
+class TrafficMix:
+    """Genera peticiones: endpoint según la mezcla y caso según una popularidad tipo Zipf.
+
+    Con probabilidad duplicate_rate se repite exactamente un caso popular (lo que en
+    producción coalesce o acierta en caché); si no, se perturba un límite para que la
+    petición sea nueva para el servidor. Cada petición se atribuye a uno de `clients`
+    clientes simulados, para que el límite de concurrencia por cliente del servidor no
+    domine los resultados.
+    """
+
+    def __init__(self, cases: List[Dict], mix: Dict[str, float], duplicate_rate: float,
+                 resolution: int, seed: int, clients: int):
+        self.cases = cases
+        self.clients = clients
+        self.endpoints = list(mix)
+        self.endpoint_weights = [mix[name] for name in self.endpoints]
+        self.case_weights = [1.0 / (rank + 1) for rank in range(len(cases))]
+        self.duplicate_rate = duplicate_rate
+        self.resolution = resolution
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next_request(self) -> Tuple[str, Dict[str, Any], bool, str]:
+        """(endpoint, cuerpo, duplicada, dirección del cliente simulado)"""
+        with self._lock:
+            client = self.random.randrange(self.clients)
+            endpoint = self.random.choices(self.endpoints, self.endpoint_weights)[0]
+            case = self.random.choices(self.cases, self.case_weights)[0]
+            duplicate = self.random.random() < self.duplicate_rate
+            limits = {axis: list(bounds) for axis, bounds in case['limits'].items()}
+            if not duplicate:
+                # Perturbación aditiva: una multiplicativa deja igual un límite 0 (p. ej. [-1, 0])
+                axis = self.random.choice(['x', 'y', 'z'])
+                lower, upper = limits[axis]
+                span = abs(upper - lower) or 1.0
+                perturbed = upper
+                while perturbed == upper or (upper > lower and perturbed <= lower):
+                    perturbed = round(upper + span * self.random.uniform(-0.25, 0.25), 4)
+                limits[axis][1] = perturbed
+
+        address = f"10.{client >> 16 & 255}.{client >> 8 & 255}.{client & 255}"
+        if endpoint == 'validate':
+            return endpoint, {'function': case['function']}, duplicate, address
+        body = {'function': case['function'], 'limits': limits,
+                'coordinate_system': case['coordinate_system']}
+        if endpoint in ('plot-data', 'plotly-3d'):
+            body['resolution'] = self.resolution
+        if endpoint == 'plotly-3d':
+            body['plot_type'] = 'surface'
+        return endpoint, body, duplicate, address
+
+# ============================================================
+# Servidor y consumo de recursos
+# ============================================================
+
+def wait_for_health(base_url: str, timeout: float) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/health', timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def start_server(command: str) -> subprocess.Popen:
+    print(f"🚀 Iniciando servidor: {command}")
+    return subprocess.Popen(shlex.split(command), cwd=HERE, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, start_new_session=True)
+
+
+class ResourceSampler:
+    """Muestrea CPU (%) y memoria residente (MB) del proceso servidor y sus hijos"""
+
+    def __init__(self, pid: Optional[int], interval: float = 1.0):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[Tuple[float, float]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def _tree_pids(self) -> List[int]:
+        pids, children = [self.pid], {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat') as handle:
+                        ppid = int(handle.read().rsplit(')', 1)[1].split()[1])
+                    children.setdefault(ppid, []).append(int(entry))
+                except (OSError, ValueError, IndexError):
+                    continue
+        for pid in pids:
+            pids.extend(children.get(pid, []))
+        return pids
+
+    def _proc_totals(self) -> Tuple[float, float]:
+        """Segundos de CPU acumulados y RSS en MB leyendo /proc"""
+        cpu_seconds, rss_mb = 0.0, 0.0
+        for pid in self._tree_pids():
+            try:
+                with open(f'/proc/{pid}/stat') as handle:
+                    fields = handle.read().rsplit(')', 1)[1].split()
+                cpu_seconds += (int(fields[11]) + int(fields[12])) / self._clock_ticks
+                rss_mb += int(fields[21]) * self._page_size / 1e6
+            except (OSError, ValueError, IndexError):
+                continue
+        return cpu_seconds, rss_mb
+
+    def _run(self) -> None:
+        if psutil is not None:
+            process = psutil.Process(self.pid)
+            tracked: Dict[int, Any] = {}
+            while not self._stop.wait(self.interval):
+                try:
+                    current = [process] + process.children(recursive=True)
+                except psutil.Error:
+                    break
+                cpu, rss = 0.0, 0.0
+                for proc in current:
+                    try:
+                        # La primera lectura de cada proceso solo fija la referencia
+                        tracked.setdefault(proc.pid, proc)
+                        cpu += tracked[proc.pid].cpu_percent(None)
+                        rss += proc.memory_info().rss / 1e6
+                    except psutil.Error:
+                        continue
+                self.samples.append((cpu, rss))
+        else:
+            previous_cpu, previous_time = self._proc_totals()[0], time.time()
+            while not self._stop.wait(self.interval):
+                cpu_seconds, rss_mb = self._proc_totals()
+                now = time.time()
+                self.samples.append((100 * (cpu_seconds - previous_cpu) / (now - previous_time), rss_mb))
+                previous_cpu, previous_time = cpu_seconds, now
+
+    def start(self) -> 'ResourceSampler':
+        if self.pid is not None and (psutil is not None or os.path.isdir('/proc')):
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, Optional[float]]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if not self.samples:
+            return {'cpu_mean_percent': None, 'cpu_max_percent': None, 'rss_max_mb': None}
+        cpu = [sample[0] for sample in self.samples]
+        return {'cpu_mean_percent': sum(cpu) / len(cpu), 'cpu_max_percent': max(cpu),
+                'rss_max_mb': max(sample[1] for sample in self.samples)}
+
+# ============================================================
+# Generación de carga
+# ============================================================
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(fraction * len(ordered))) - 1)]
+
+
+def send(base_url: str, endpoint: str, body: Dict, timeout: float, client: str) -> Tuple[str, Optional[int]]:
+    """Devuelve (resultado, código HTTP): ok, error, rejected_429 (por cliente), rejected_503 o timeout.
+
+    El cliente simulado va en X-Forwarded-For, que el servidor solo acepta desde sus
+    proxies de confianza (127.0.0.1 por defecto): contra otra dirección todas las
+    peticiones cuentan como un único cliente.
+    """
+    request = urllib.request.Request(base_url + ENDPOINTS[endpoint], data=json.dumps(body).encode(),
+                                     headers={'Content-Type': 'application/json', 'X-Forwarded-For': client},
+                                     method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = json.loads(response.read() or b'{}')
+            ok = payload.get('success', payload.get('valid', True)) is not False
+            return ('ok' if ok else 'error'), response.status
+    except urllib.error.HTTPError as e:
+        return (f'rejected_{e.code}' if e.code in (429, 503) else 'error'), e.code
+    except (TimeoutError, OSError) as e:
+        if isinstance(e, TimeoutError) or 'timed out' in str(e):
+            return 'timeout', None
+        return 'error', None
+
+
+def run_stage(base_url: str, traffic: TrafficMix, rps: float, duration: float, warmup: float,
+              timeout: float, max_concurrency: int, server_pid: Optional[int], seed: int) -> Dict[str, Any]:
+    """Carga en lazo abierto con llegadas de Poisson a rps peticiones por segundo.
+
+    La latencia se mide desde el instante programado, no desde el envío, para no ocultar
+    la espera cuando el cliente se satura (coordinated omission).
+    """
+    arrivals = random.Random(seed)
+    records: List[Dict[str, Any]] = []
+    records_lock = threading.Lock()
+    sampler = ResourceSampler(server_pid)
+    start = time.time()
+    measure_from = start + warmup
+    end = measure_from + duration
+
+    def fire(scheduled: float, endpoint: str, body: Dict, duplicate: bool, client: str):
+        outcome, status = send(base_url, endpoint, body, timeout, client)
+        finished = time.time()
+        if scheduled >= measure_from:
+            with records_lock:
+                records.append({'endpoint': endpoint, 'outcome': outcome, 'status': status,
+                                'latency': finished - scheduled, 'duplicate': duplicate, 'finished': finished})
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        scheduled = start
+        sampler_started = False
+        while scheduled < end:
+            scheduled += arrivals.expovariate(rps)
+            delay = scheduled - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            if not sampler_started and scheduled >= measure_from:
+                sampler.start()
+                sampler_started = True
+            pool.submit(fire, scheduled, *traffic.next_request())
+    resources = sampler.stop()
+
+    def summarize(subset: List[Dict]) -> Dict[str, Any]:
+        latencies = [record['latency'] for record in subset if record['outcome'] == 'ok']
+        count = len(subset)
+        outcomes = {name: sum(1 for record in subset if record['outcome'] == name)
+                    for name in ('ok', 'error', 'rejected_429', 'rejected_503', 'timeout')}
+        return {
+            'requests': count,
+            **outcomes,
+            'throughput': outcomes['ok'] / duration,
+            'error_rate': outcomes['error'] / count if count else 0.0,
+            'rejected_429_rate': outcomes['rejected_429'] / count if count else 0.0,
+            'rejected_503_rate': outcomes['rejected_503'] / count if count else 0.0,
+            'timeout_rate': outcomes['timeout'] / count if count else 0.0,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies) if latencies else None
+        }
+
+    return {
+        'target_rps': rps,
+        'offered_rps': len(records) / duration,
+        'duplicates': sum(1 for record in records if record['duplicate']),
+        'total': summarize(records),
+        'endpoints': {name: summarize([record for record in records if record['endpoint'] == name])
+                      for name in traffic.endpoints},
+        'resources': resources
+    }
+
+# ============================================================
+# Informe
+# ============================================================
+
+def format_ms(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value * 1000:.0f}"
+
+
+def print_stage(stage: Dict[str, Any]) -> None:
+    total = stage['total']
+    resources = stage['resources']
+    print(f"\n📈 Objetivo {stage['target_rps']:g} req/s · ofrecido {stage['offered_rps']:.1f} req/s · "
+          f"completado {total['throughput']:.1f} req/s · duplicadas {stage['duplicates']}")
+    print(f"{'endpoint':<12}{'n':>6}{'ok':>6}{'err':>6}{'429':>6}{'503':>6}{'t/o':>6}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for name, summary in [*stage['endpoints'].items(), ('TOTAL', total)]:
+        print(f"{name:<12}{summary['requests']:>6}{summary['ok']:>6}{summary['error']:>6}"
+              f"{summary['rejected_429']:>6}{summary['rejected_503']:>6}{summary['timeout']:>6}"
+              f"{format_ms(summary['p50']):>9}"
+              f"{format_ms(summary['p95']):>9}{format_ms(summary['p99']):>9}{format_ms(summary['max']):>9}")
+    if resources['cpu_mean_percent'] is not None:
+        print(f"🖥️  CPU servidor: media {resources['cpu_mean_percent']:.0f}%, "
+              f"máx {resources['cpu_max_percent']:.0f}% · RSS máx {resources['rss_max_mb']:.0f} MB")
+
+
+def find_saturation(stages: List[Dict[str, Any]]) -> Optional[float]:
+    """Primera etapa donde el p95 se dispara, hay errores o no se sirve la carga ofrecida.
+
+    Los 429 dependen del límite por cliente, no de la capacidad del servidor: no cuentan
+    como degradación y se descuentan de la carga ofrecida.
+    """
+    baseline = stages[0]['total']['p95']
+    for stage in stages:
+        total = stage['total']
+        servable_rps = stage['offered_rps'] * (1 - total['rejected_429_rate'])
+        degraded = (total['error_rate'] + total['rejected_503_rate'] + total['timeout_rate'] > SATURATION_ERROR_RATE
+                    or (baseline and total['p95'] and total['p95'] > SATURATION_P95_FACTOR * baseline)
+                    or total['throughput'] < 0.9 * servable_rps)
+        if degraded:
+            return stage['target_rps']
+    return None
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Endpoint desconocido en la mezcla: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def fetch_metrics(base_url: str) -> Optional[Dict]:
+    try:
+        with urllib.request.urlopen(base_url + '/metrics', timeout=5) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Prueba de carga del microservicio INTEGRA')
+    parser.add_argument('--url', help='Instancia ya iniciada (si se omite se arranca una local)')
+    parser.add_argument('--serve-cmd', default=f'{shlex.quote(sys.executable)} app.py',
+                        help='Comando para arrancar el servidor local (p. ej. gunicorn con N workers)')
+    parser.add_argument('--server-pid', type=int, help='PID del servidor a medir cuando se usa --url')
+    parser.add_argument('--rps', default='5', help='Peticiones por segundo; varias separadas por comas')
+    parser.add_argument('--duration', type=float, default=30, help='Segundos medidos por etapa')
+    parser.add_argument('--warmup', type=float, default=5, help='Segundos iniciales no medidos por etapa')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Pesos por endpoint (por defecto {DEFAULT_MIX})')
+    parser.add_argument('--duplicate-rate', type=float, default=0.3,
+                        help='Fracción de peticiones idénticas a un caso popular')
+    parser.add_argument('--resolution', type=int, default=30, help='Resolución de las gráficas')
+    parser.add_argument('--timeout', type=float, default=60, help='Timeout por petición (s)')
+    parser.add_argument('--max-concurrency', type=int, default=64, help='Peticiones simultáneas del cliente')
+    parser.add_argument('--clients', type=int, default=256,
+                        help='Clientes simulados (X-Forwarded-For distinto; el servidor solo lo acepta desde 127.0.0.1)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', dest='json_path', help='Guardar el informe completo en JSON')
+    args = parser.parse_args()
+
+    cases = load_cases(CASE_FILES)
+    if not cases:
+        print("❌ No se encontraron casos en src/data")
+        return 1
+    traffic = TrafficMix(cases, args.mix, args.duplicate_rate, args.resolution, args.seed, max(1, args.clients))
+    print(f"📚 {len(cases)} casos de ejemplo · mezcla {args.mix} · duplicadas {args.duplicate_rate:.0%}")
+
+    server = None
+    base_url = (args.url or DEFAULT_URL).rstrip('/')
+    server_pid = args.server_pid
+    if not args.url:
+        server = start_server(args.serve_cmd)
+        server_pid = server.pid
+        if not wait_for_health(base_url, timeout=60):
+            print("❌ El servidor no respondió a /health")
+            server.terminate()
+            return 1
+
+    stages = []
+    try:
+        for index, rps in enumerate(float(value) for value in args.rps.split(',')):
+            stage = run_stage(base_url, traffic, rps, args.duration, args.warmup, args.timeout,
+                              args.max_concurrency, server_pid, args.seed + index)
+            print_stage(stage)
+            stages.append(stage)
+        metrics = fetch_metrics(base_url)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    saturation = find_saturation(stages)
+    if len(stages) > 1:
+        print(f"\n🎯 Saturación: {f'a partir de {saturation:g} req/s' if saturation else 'no alcanzada'}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as handle:
+            json.dump({'config': {**vars(args), 'cases': len(cases)}, 'stages': stages,
+                       'saturation_rps': saturation, 'server_metrics': metrics}, handle, indent=2, default=str)
+        print(f"💾 Informe guardado en {args.json_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -31,13 +31,35 @@ const checkPythonService = async (req, res, next) => {
   }
 };
 
+/**
+ * Reenvía al navegador los rechazos del control de admisión de Python (429/503 con Retry-After)
+ */
+const forwardAdmissionRejection = (error, res) => {
+  const status = error.response && error.response.status;
+  if (status !== 429 && status !== 503) {
+    return false;
+  }
+  const retryAfter = error.response.headers['retry-after'];
+  if (retryAfter) {
+    res.setHeader('Retry-After', retryAfter);
+  }
+  if (error.response.data && typeof error.response.data.pipe === 'function') {
+    // Peticiones con responseType 'stream'
+    res.status(status).type('application/json');
+    error.response.data.pipe(res);
+  } else {
+    res.status(status).json(error.response.data);
+  }
+  return true;
+};
+
 /**
  * POST /api/python-solver/solve
  * Resolver integral triple usando Python (SymPy + SciPy)
  */
 router.post('/solve', checkPythonService, async (req, res) => {
   try {
-    const { function: functionStr, limits, coordinate_system } = req.body;
+    const { function: functionStr, limits, coordinate_system, precision, quadrature, numerical_engine } = req.body;
 
     // Validar entrada
     if (!functionStr || !limits) {
@@ -64,15 +86,19 @@ router.post('/solve', checkPythonService, async (req, res) => {
       limits
     });
 
-    // Llamar al servicio Python
+    // Llamar al servicio Python (las opciones solo se envían si vienen en la petición)
     const pythonResponse = await axios.post(`${PYTHON_SOLVER_URL}/solve`, {
       function: functionStr,
       limits: limits,
-      coordinate_system: coordinate_system || 'cartesian'
+      coordinate_system: coordinate_system || 'cartesian',
+      ...(precision !== undefined && { precision }),
+      ...(quadrature !== undefined && { quadrature }),
+      ...(numerical_engine !== undefined && { numerical_engine })
     }, {
       timeout: TIMEOUT,
       headers: {
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/json',
+        'X-Forwarded-For': req.ip
       }
     });
 
@@ -107,6 +133,11 @@ router.post('/solve', checkPythonService, async (req, res) => {
         steps: formattedSteps,
         method: result.method || 'Python Solver',
         execution_time: result.execution_time || 0,
+        ...(result.result_high_precision !== undefined && {
+          result_high_precision: result.result_high_precision,
+          precision_digits: result.precision_digits
+        }),
+        ...(result.numerical_engine !== undefined && { numerical_engine: result.numerical_engine }),
         metadata: metadata,
         solver_info: {
           type: 'python',
@@ -138,6 +169,15 @@ router.post('/solve', checkPythonService, async (req, res) => {
   } catch (error) {
     console.error('❌ Error en Python Solver endpoint:', error.message);
     
+    if (forwardAdmissionRejection(error, res)) {
+      return;
+    }
+
+    // Parámetros rechazados por Python (precisión, cuadratura, motor, límites)
+    if (error.response && error.response.status === 400) {
+      return res.status(400).json(error.response.data);
+    }
+
     // Distinguir entre diferentes tipos de errores
     if (error.code === 'ECONNREFUSED') {
       res.status(503).json({
@@ -162,6 +202,126 @@ router.post('/solve', checkPythonService, async (req, res) => {
   }
 });
 
+/**
+ * POST /api/python-solver/solve/stream
+ * Resolver integral triple emitiendo los pasos en tiempo real (SSE o NDJSON)
+ */
+router.post('/solve/stream', checkPythonService, async (req, res) => {
+  const { function: functionStr, limits } = req.body;
+
+  if (!functionStr || !limits) {
+    return res.status(400).json({
+      success: false,
+      error: 'Función y límites son requeridos'
+    });
+  }
+
+  const format = req.query.format === 'ndjson' ? 'ndjson' : 'sse';
+  const controller = new AbortController();
+
+  try {
+    // Reenviar el flujo sin acumularlo: cada evento llega al navegador al producirse
+    const pythonResponse = await axios.post(`${PYTHON_SOLVER_URL}/solve/stream`, req.body, {
+      params: { format },
+      responseType: 'stream',
+      timeout: TIMEOUT,
+      signal: controller.signal,
+      headers: {
+        'Content-Type': 'application/json',
+        'X-Forwarded-For': req.ip
+      }
+    });
+
+    res.status(200);
+    res.setHeader('Content-Type', pythonResponse.headers['content-type']);
+    res.setHeader('Cache-Control', 'no-cache');
+    res.setHeader('X-Accel-Buffering', 'no');
+    res.flushHeaders();
+
+    // Si el navegador cierra la conexión, dejar de leer del servicio Python
+    res.on('close', () => controller.abort());
+    pythonResponse.data.pipe(res);
+
+  } catch (error) {
+    console.error('❌ Error en Python Solver stream:', error.message);
+
+    if (res.headersSent) {
+      return res.end();
+    }
+    if (forwardAdmissionRejection(error, res)) {
+      return;
+    }
+    if (error.code === 'ECONNREFUSED') {
+      res.status(503).json({
+        success: false,
+        error: 'Servicio Python no disponible',
+        fallback: true
+      });
+    } else if (error.response) {
+      res.status(error.response.status).json({
+        success: false,
+        error: 'Solicitud rechazada por el servicio Python'
+      });
+    } else {
+      res.status(500).json({
+        success: false,
+        error: 'Error interno del servidor',
+        details: error.message
+      });
+    }
+  }
+});
+
+/**
+ * POST /api/python-solver/solve/sweep
+ * Resolver la integral para una familia de valores de un parámetro (serie lista para graficar)
+ */
+router.post('/solve/sweep', checkPythonService, async (req, res) => {
+  try {
+    const { function: functionStr, limits, parameter, values } = req.body;
+
+    if (!functionStr || !limits || !parameter || !values) {
+      return res.status(400).json({
+        success: false,
+        error: 'Función, límites, parámetro y valores son requeridos'
+      });
+    }
+
+    const pythonResponse = await axios.post(`${PYTHON_SOLVER_URL}/solve/sweep`, req.body, {
+      timeout: TIMEOUT,
+      headers: {
+        'Content-Type': 'application/json',
+        'X-Forwarded-For': req.ip
+      }
+    });
+
+    const result = pythonResponse.data;
+    res.status(result.success ? 200 : 422).json(result);
+
+  } catch (error) {
+    console.error('❌ Error en Python Solver sweep:', error.message);
+
+    if (forwardAdmissionRejection(error, res)) {
+      return;
+    }
+    if (error.code === 'ECONNREFUSED') {
+      res.status(503).json({
+        success: false,
+        error: 'Servicio Python no disponible',
+        fallback: true
+      });
+    } else if (error.response) {
+      res.status(error.response.status).json(error.response.data);
+    } else {
+      res.status(500).json({
+        success: false,
+        error: 'Error interno del servidor',
+        details: error.message
+      });
+    }
+  }
+});
+
 /**
  * POST /api/python-solver/validate
  * Validar sintaxis de función matemática
@@ -182,7 +342,8 @@ router.post('/validate', checkPythonService, async (req, res) => {
     }, {
       timeout: 10000,
       headers: {
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/json',
+        'X-Forwarded-For': req.ip
       }
     });
 
@@ -334,7 +495,8 @@ router.post('/generate-plot-data', checkPythonService, async (req, res) => {
     }, {
       timeout: TIMEOUT,
       headers: {
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/json',
+        'X-Forwarded-For': req.ip
       }
     });
 
@@ -367,6 +529,10 @@ router.post('/generate-plot-data', checkPythonService, async (req, res) => {
   } catch (error) {
     console.error('❌ Error en endpoint de visualización:', error.message);
     
+    if (forwardAdmissionRejection(error, res)) {
+      return;
+    }
+
     if (error.code === 'ECONNREFUSED') {
       res.status(503).json({
         success: false,
@@ -432,7 +598,8 @@ router.post('/generate-plotly-3d', checkPythonService, async (req, res) => {
     }, {
       timeout: TIMEOUT,
       headers: {
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/json',
+        'X-Forwarded-For': req.ip
       }
     });
 
@@ -466,6 +633,10 @@ router.post('/generate-plotly-3d', checkPythonService, async (req, res) => {
   } catch (error) {
     console.error('❌ Error en endpoint Plotly 3D:', error.message);
     
+    if (forwardAdmissionRejection(error, res)) {
+      return;
+    }
+
     if (error.code === 'ECONNREFUSED') {
       res.status(503).json({
         success: false,